@@ -3,6 +3,7 @@ from dataclasses import dataclass
 from constants import *
 from typing import Union, Literal
 import graphics
+import pygame
 from utils import Vector
 from game import Game, Move
 
@@ -30,14 +31,18 @@ class Animation:
         graphics_info: graphics.GraphicsInfo,
     ) -> None:
         # Unpack graphics variables
+        self.graphics_info = graphics_info
         if graphics_info:
-            (
-                self.canvas,
-                self.clock,
-                self.floor_font,
-                self.main_font,
-                self.images,
-            ) = graphics_info
+            self.canvas = graphics_info.canvas
+            self.clock = graphics_info.clock
+            self.floor_font = graphics_info.floor_font
+            self.main_font = graphics_info.main_font
+            self.images = graphics_info.images
+
+        # The screen without the moving tiles, copied on the first render
+        self.background: Union[pygame.Surface, None] = None
+        # Where moving tiles were drawn in the last frame
+        self.tile_rects: List[pygame.Rect] = []
 
         self.old_game = old_game
         self.move = move
@@ -49,6 +54,9 @@ class Animation:
 
         self.tiles: List[AnimatingTile] = []
 
+        old_index = graphics.get_position_index(graphics_info, old_game)
+        new_index = graphics.get_position_index(graphics_info, new_game)
+
         # Move tiles from pattern lines to wall
         if not move:
             for player_index in [0, 1]:
@@ -56,12 +64,8 @@ class Animation:
                     line = self.old_game.players[player_index].pattern_lines[line_index]
 
                     if line.space == 0 and line.tile != EMPTY:
-                        old_position = graphics.get_game_rendering_positions(
-                            old_game,
-                            line.tile,
-                            player_index=player_index,
-                            player_type="pattern_line",
-                            line_index=line_index,
+                        old_position = old_index.get(
+                            ("pattern_line", player_index, line_index), line.tile
                         )[-1]
                         new_position = graphics.get_game_rendering_positions(
                             new_game,
@@ -75,29 +79,22 @@ class Animation:
                         )
 
         else:
+            source: graphics.TileSource = (
+                ("center_pile", 0, 0)
+                if move.is_center_draw
+                else ("factory", move.factory_index, 0)
+            )
+            floor: graphics.TileSource = ("floor", move.player_index, 0)
+
             if len(move.floor_tiles) > 0:
                 for tile in TILE_TYPES:
-                    if move.is_center_draw:
-                        positions = graphics.get_game_rendering_positions(
-                            old_game, tile, center_pile=True
-                        )
-                    else:
-                        positions = graphics.get_game_rendering_positions(
-                            old_game, tile, factory_index=move.factory_index
-                        )
-
-                    new_positions = graphics.get_game_rendering_positions(
-                        new_game,
-                        tile,
-                        player_index=move.player_index,
-                        player_type="floor",
-                    )
+                    positions = old_index.get(source, tile)
 
                     # Exclude tiles that already existed on the floor
                     num_old_tiles = old_game.players[move.player_index].floor.count(
                         tile
                     )
-                    new_positions = new_positions[num_old_tiles:]
+                    new_positions = new_index.get(floor, tile)[num_old_tiles:]
 
                     # Make sure that these are new positions, because positions list has tiles that aren't going on the floor
                     for index in range(len(new_positions)):
@@ -107,33 +104,16 @@ class Animation:
 
             if move.first_draw_from_center:
                 # Animate starting marker
-                position = graphics.get_game_rendering_positions(
-                    old_game, STARTING_MARKER, center_pile=True
-                )[0]
-                new_position = graphics.get_game_rendering_positions(
-                    new_game,
-                    STARTING_MARKER,
-                    player_index=move.player_index,
-                    player_type="floor",
-                )[0]
+                position = old_index.get(("center_pile", 0, 0), STARTING_MARKER)[0]
+                new_position = new_index.get(floor, STARTING_MARKER)[0]
                 self.tiles.append(
                     AnimatingTile(STARTING_MARKER, position, new_position)
                 )
 
                 # Animate tiles that were already on the floor
                 for tile in TILE_TYPES:
-                    positions = graphics.get_game_rendering_positions(
-                        old_game,
-                        tile,
-                        player_index=move.player_index,
-                        player_type="floor",
-                    )
-                    new_positions = graphics.get_game_rendering_positions(
-                        new_game,
-                        tile,
-                        player_index=move.player_index,
-                        player_type="floor",
-                    )
+                    positions = old_index.get(floor, tile)
+                    new_positions = new_index.get(floor, tile)
 
                     for index in range(len(positions)):
                         self.tiles.append(
@@ -141,20 +121,9 @@ class Animation:
                         )
 
             # Animate the drawn tiles to pattern lines
-            if move.is_center_draw:
-                positions = graphics.get_game_rendering_positions(
-                    old_game, move.drawing, center_pile=True
-                )
-            else:
-                positions = graphics.get_game_rendering_positions(
-                    old_game, move.drawing, factory_index=move.factory_index
-                )
-            new_positions = graphics.get_game_rendering_positions(
-                new_game,
-                move.drawing,
-                player_index=move.player_index,
-                player_type="pattern_line",
-                line_index=move.pattern_line,
+            positions = old_index.get(source, move.drawing)
+            new_positions = new_index.get(
+                ("pattern_line", move.player_index, move.pattern_line), move.drawing
             )
             for index in range(len(positions) - len(move.floor_tiles)):
                 self.tiles.append(
@@ -169,14 +138,11 @@ class Animation:
             if not move.is_center_draw:
                 for tile in TILE_TYPES:
                     if tile != move.drawing:
-                        positions = graphics.get_game_rendering_positions(
-                            old_game, tile, factory_index=move.factory_index
-                        )
-                        new_positions = graphics.get_game_rendering_positions(
-                            new_game, tile, center_pile=True
-                        )
+                        positions = old_index.get(source, tile)
                         num_old_tiles = old_game.center_pile[tile]
-                        new_positions = new_positions[num_old_tiles:]
+                        new_positions = new_index.get(("center_pile", 0, 0), tile)[
+                            num_old_tiles:
+                        ]
 
                         for index in range(len(positions)):
                             self.tiles.append(
@@ -189,12 +155,8 @@ class Animation:
 
             # Animate center pile shuffling
             for tile in TILE_TYPES:
-                positions = graphics.get_game_rendering_positions(
-                    old_game, tile, center_pile=True
-                )
-                new_positions = graphics.get_game_rendering_positions(
-                    new_game, tile, center_pile=True
-                )
+                positions = old_index.get(("center_pile", 0, 0), tile)
+                new_positions = new_index.get(("center_pile", 0, 0), tile)
 
                 max_index = min(len(positions), len(new_positions))
 
@@ -207,74 +169,63 @@ class Animation:
                         )
                     )
 
-        self.render_all_other_tiles()
+        self.render_all_other_tiles(old_index)
 
     # Renders any tiles that aren't moving
-    def render_all_other_tiles(
-        self,
-    ):
-        types: List[Union[Tile, Literal[6]]] = [
-            STARTING_MARKER,
-            *TILE_TYPES,
-        ]
-        taken_positions = [tile.position for tile in self.tiles]
-
-        for tile in types:
-            positions: List[Vector] = []
-
-            positions.extend(
-                graphics.get_game_rendering_positions(
-                    self.old_game, tile, center_pile=True
-                )
-            )
-
-            for factory_index in range(FACTORY_COUNT):
-                positions.extend(
-                    graphics.get_game_rendering_positions(
-                        self.old_game,
-                        tile,
-                        factory_index=factory_index,
-                    )
-                )
+    def render_all_other_tiles(self, old_index: graphics.PositionIndex) -> None:
+        taken_positions = {graphics.grid_key(tile.position) for tile in self.tiles}
 
-            for player_index in [0, 1]:
-                positions.extend(
-                    graphics.get_game_rendering_positions(
-                        self.old_game,
-                        tile,
-                        player_index=player_index,
-                        player_type="floor",
-                    )
+        for position, tile in old_index.tiles.items():
+            if position not in taken_positions:
+                self.tiles.append(
+                    AnimatingTile(tile, Vector(*position), Vector(*position))
                 )
 
-                for line_index in range(WALL_SIZE):
-                    positions.extend(
-                        graphics.get_game_rendering_positions(
-                            self.old_game,
-                            tile,
-                            player_index=player_index,
-                            player_type="pattern_line",
-                            line_index=line_index,
-                        )
-                    )
-
-            for position in positions:
-                if position not in taken_positions:
-                    self.tiles.append(AnimatingTile(tile, position, position))
-
     # Updates the animation details of all tiles
     def update(self) -> None:
         if self.frame_count == ANIMATION_SECONDS * FRAME_RATE:
             self.finished = True
+            # Moving tiles were drawn outside of render_game's regions
+            graphics.invalidate(self.graphics_info)
         else:
             for tile in self.tiles:
                 tile.position += tile.movement
 
             self.frame_count += 1
 
-    def render(self):
+    # Returns the rectangles that changed, only the moving tiles are redrawn after the first frame
+    def render(self) -> List[pygame.Rect]:
+        if self.background is None:
+            self.background = self.canvas.copy()
+            for tile in self.tiles:
+                if tile.movement == Vector(0, 0):
+                    self.background.blit(
+                        self.images[tile.tile].normal,
+                        (tile.position.x, tile.position.y),
+                    )
+
+            self.canvas.blit(self.background, (0, 0))
+            dirty_rects = [self.canvas.get_rect()]
+        else:
+            # Erase the moving tiles from the last frame
+            for rect in self.tile_rects:
+                self.canvas.blit(self.background, rect, rect)
+            dirty_rects = self.tile_rects
+
+        self.tile_rects = []
         for tile in self.tiles:
-            self.canvas.blit(
-                self.images[tile.tile].normal,
-                (tile.position.x, tile.position.y),
-            )
+            if tile.movement != Vector(0, 0):
+                self.canvas.blit(
+                    self.images[tile.tile].normal,
+                    (tile.position.x, tile.position.y),
+                )
+                self.tile_rects.append(
+                    pygame.Rect(
+                        int(tile.position.x),
+                        int(tile.position.y),
+                        TILE_SIZE + 1,
+                        TILE_SIZE + 1,
+                    )
+                )
+
+        return dirty_rects + self.tile_rects
@@ -0,0 +1,22 @@
+import json
+from constants import *
+from typing import Dict, Tuple
+from game import Game
+
+
+# Fixed positions used by the benchmarks and perft, from the start, middle and end of random games
+# Every position is stored as a hex snapshot (Game.to_bytes), which unlike Game.to_json keeps the bonuses
+# The file is the only source of these positions: changing it invalidates saved benchmark baselines
+# and the leaf counts in perft_test.py
+CORPUS_FILE = "benchmark_positions.json"
+
+
+# Returns every stored position with the index of the player to move
+def load_corpus(path: str = CORPUS_FILE) -> Dict[str, Tuple[Game, int]]:
+    with open(path, "r", encoding="utf-8") as file:
+        corpus = json.load(file)
+
+    return {
+        name: Game.from_bytes(bytes.fromhex(snapshot))
+        for name, snapshot in corpus.items()
+    }
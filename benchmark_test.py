@@ -1,67 +1,158 @@
+# Benchmarks for the engine hot paths over a fixed corpus of positions (benchmark_positions.json)
+#
+# Save a baseline:      pytest benchmark_test.py --benchmark-autosave
+# Check for slowdowns:  pytest benchmark_test.py --benchmark-compare
+# A comparison fails when any benchmark's fastest run is more than 10% slower than the baseline (see conftest.py)
 from constants import *
+from typing import Tuple, Union
+import multiprocessing
+import subprocess
+import sys
+import pytest
 from pytest_benchmark.fixture import BenchmarkFixture as Benchmark
 from game import Game
 from search import negascout
 from evaluation import game_evaluation, load_player_eval
+from benchmark_corpus import load_corpus
+from workers import get_context
 
 
-def test_negascout(benchmark: Benchmark):
-    game = Game(seed=0)
-    benchmark(negascout, load_player_eval(EVALUATION_VERSION), game, 0, 2, 2)
+EVALUATION_VERSIONS = ["v1", "v2", "v3", "v4"]
+NEGASCOUT_DEPTHS = [1, 2, 3]
+# Float scores and whole 1/100 points
+RESOLUTIONS = [None, 100]
+STARTUP_MODULES = [
+    "game",
+    "search",
+    *[f"evaluation_versions.{v}" for v in EVALUATION_VERSIONS],
+]
+START_METHODS = [
+    method
+    for method in ["fork", "spawn", "forkserver"]
+    if method in multiprocessing.get_all_start_methods()
+]
+# Every round starts a new interpreter or process, so startup is only measured a few times
+STARTUP_ROUNDS = 5
 
 
-def test_serialize(benchmark: Benchmark):
-    game = Game(seed=0)
-    benchmark(game.serialize)
+CORPUS = load_corpus()
 
 
-def test_no_moves(benchmark: Benchmark):
-    game = Game(seed=0)
+@pytest.fixture(params=list(CORPUS))
+def position(request: pytest.FixtureRequest) -> Tuple[Game, int]:
+    game, turn = CORPUS[request.param]
+    return game.copy(), turn
+
+
+def test_moves(benchmark: Benchmark, position: Tuple[Game, int]):
+    game, turn = position
+    benchmark(game.all_moves, turn)
+
+
+def test_make_undo_move(benchmark: Benchmark, position: Tuple[Game, int]):
+    game, turn = position
+    move = game.all_moves(turn)[0]
+
+    def make_undo():
+        game.make_move(turn, move)
+        game.undo_move(turn, move)
+
+    benchmark(make_undo)
+
+
+def test_no_moves(benchmark: Benchmark, position: Tuple[Game, int]):
+    game, _ = position
     benchmark(game.are_no_moves)
 
 
-def test_moves(benchmark: Benchmark):
-    game = Game(seed=0)
-    benchmark(game.all_moves, 0)
+def test_points(benchmark: Benchmark, position: Tuple[Game, int]):
+    game, _ = position
+    benchmark(game.calculate_points)
 
 
-def test_make_move(benchmark: Benchmark):
-    game = Game(seed=0)
-    benchmark(game.make_move, 0, game.all_moves(0)[0])
+def test_serialize(benchmark: Benchmark, position: Tuple[Game, int]):
+    game, _ = position
+    benchmark(game.serialize, game.calculate_points())
 
 
-def test_undo_move(benchmark: Benchmark):
-    game = Game(seed=0)
-    benchmark(game.undo_move, 0, game.all_moves(0)[0])
+def test_copy(benchmark: Benchmark, position: Tuple[Game, int]):
+    game, _ = position
+    benchmark(game.copy)
 
 
-def test_points(benchmark: Benchmark):
-    game = Game(seed=0)
-    func = lambda: game.calculate_points()
-    benchmark(func)
+def test_to_bytes(benchmark: Benchmark, position: Tuple[Game, int]):
+    game, turn = position
+    benchmark(game.to_bytes, turn)
 
 
-def test_evaluation_v3(benchmark: Benchmark):
-    game = Game(seed=0)
-    points_result = game.calculate_points()
-    player_eval = load_player_eval("v3")
+def test_from_bytes(benchmark: Benchmark, position: Tuple[Game, int]):
+    game, turn = position
+    benchmark(Game.from_bytes, game.to_bytes(turn))
+
+
+@pytest.mark.parametrize("version", EVALUATION_VERSIONS)
+def test_evaluation(benchmark: Benchmark, position: Tuple[Game, int], version: str):
+    game, _ = position
+    points_results = game.calculate_points()
+    player_eval = load_player_eval(version)
     benchmark(
         game_evaluation,
         game,
         game.players[0],
-        points_result,
+        game.players[1],
+        points_results,
         player_eval["player_evaluation"],
     )
 
 
-def test_evaluation_v4(benchmark: Benchmark):
-    game = Game(seed=0)
-    points_result = game.calculate_points()
-    player_eval = load_player_eval("v4")
-    benchmark(
-        game_evaluation,
+@pytest.mark.parametrize("resolution", RESOLUTIONS)
+@pytest.mark.parametrize("depth", NEGASCOUT_DEPTHS)
+def test_negascout(
+    benchmark: Benchmark,
+    position: Tuple[Game, int],
+    depth: int,
+    resolution: Union[int, None],
+):
+    game, turn = position
+    player_eval = load_player_eval("v3")
+
+    result = benchmark(
+        negascout,
+        player_eval,
         game,
-        game.players[0],
-        points_result,
-        player_eval["player_evaluation"],
+        turn,
+        depth,
+        depth,
+        resolution=resolution,
     )
+
+    if benchmark.stats is not None:
+        benchmark.extra_info["nodes"] = result.nodes_searched
+        benchmark.extra_info["nodes_per_second"] = (
+            result.nodes_searched / benchmark.stats.stats.mean
+        )
+
+
+# Time for a new interpreter to import a module (what a spawned process pays before it can search)
+@pytest.mark.parametrize("module", STARTUP_MODULES)
+def test_import_startup(benchmark: Benchmark, module: str):
+    benchmark.pedantic(
+        subprocess.run,
+        args=([sys.executable, "-c", f"import {module}"],),
+        kwargs={"check": True},
+        rounds=STARTUP_ROUNDS,
+    )
+
+
+# Time to start an engine process that loads an evaluation, as driver.EngineSearch does for every move
+@pytest.mark.parametrize("start_method", START_METHODS)
+def test_engine_startup(benchmark: Benchmark, start_method: StartMethod):
+    context = get_context(start_method, preload=["evaluation_versions.v3"])
+
+    def start_engine():
+        process = context.Process(target=load_player_eval, args=("v3",))
+        process.start()
+        process.join()
+
+    # The first round also starts the fork server
+    benchmark.pedantic(start_engine, rounds=STARTUP_ROUNDS, warmup_rounds=1)
@@ -0,0 +1,91 @@
+import json
+import os
+import random
+from typing import Any, Dict, Union
+
+
+# Append-only log of finished games, one JSON object per line
+# The first line is a header describing the run, so a log is never resumed with different settings
+# Every game is identified by its seed, which is derived from a base seed stored in the header
+# Metadata is also kept from the first run, unlike settings it doesn't have to match when resuming
+class ProgressLog:
+    def __init__(
+        self,
+        path: str,
+        settings: Dict[str, Any],
+        metadata: Union[Dict[str, Any], None] = None,
+    ) -> None:
+        self.path = path
+        self.settings = settings
+        self.metadata = {} if metadata is None else metadata
+        self.base_seed = random.randint(0, 2**31 - 1)
+        self.entries: Dict[int, Dict[str, Any]] = {}
+
+        if os.path.exists(path):
+            self.load()
+
+        self.file = open(path, "a", encoding="utf-8")
+        if os.path.getsize(path) == 0:
+            self.write(
+                {
+                    "settings": settings,
+                    "base_seed": self.base_seed,
+                    "metadata": self.metadata,
+                }
+            )
+
+    def load(self) -> None:
+        with open(self.path, "r", encoding="utf-8") as file:
+            lines = file.readlines()
+
+        # A header cut off by a crash means that nothing was finished yet
+        if len(lines) == 0 or not lines[0].endswith("\n"):
+            open(self.path, "w").close()
+            return
+
+        header = json.loads(lines[0])
+        if header["settings"] != self.settings:
+            raise Exception(
+                f"{self.path} was created by a different run ({header['settings']}), delete it to start over"
+            )
+
+        self.base_seed = header["base_seed"]
+        self.metadata = header.get("metadata", {})
+
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # The last line may have been cut off by a crash, that work is simply redone
+                continue
+
+            self.entries[entry["seed"]] = entry
+
+        # Drop a partially written last line so new entries start on their own line
+        if not lines[-1].endswith("\n"):
+            with open(self.path, "w", encoding="utf-8") as file:
+                file.writelines(lines[:-1])
+
+    def write(self, entry: Dict[str, Any]) -> None:
+        self.file.write(json.dumps(entry) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def append(self, seed: int, **data: Any) -> None:
+        entry = {"seed": seed, **data}
+        self.entries[seed] = entry
+        self.write(entry)
+
+    def seed(self, index: int) -> int:
+        return self.base_seed + index
+
+    def is_done(self, seed: int) -> bool:
+        return seed in self.entries
+
+    def close(self) -> None:
+        self.file.close()
+
+    # Called once the results have been merged elsewhere
+    def remove(self) -> None:
+        self.close()
+        os.remove(self.path)
@@ -0,0 +1,62 @@
+import json
+import pytest
+from checkpoint import ProgressLog
+
+
+def test_resume(tmp_path):
+    path = str(tmp_path / "progress.jsonl")
+    progress = ProgressLog(path, {"games": 10}, metadata={"rows": 5})
+    progress.append(progress.seed(0), data_points=3)
+    progress.close()
+
+    # Metadata is kept from the first run
+    resumed = ProgressLog(path, {"games": 10}, metadata={"rows": 8})
+    assert resumed.base_seed == progress.base_seed
+    assert resumed.metadata == {"rows": 5}
+    assert resumed.is_done(progress.seed(0))
+    assert not resumed.is_done(progress.seed(1))
+    assert resumed.entries[progress.seed(0)]["data_points"] == 3
+    resumed.close()
+
+
+def test_different_settings(tmp_path):
+    path = str(tmp_path / "progress.jsonl")
+    ProgressLog(path, {"games": 10}).close()
+
+    with pytest.raises(Exception, match="different run"):
+        ProgressLog(path, {"games": 20})
+
+
+def test_cut_off_lines(tmp_path):
+    path = str(tmp_path / "progress.jsonl")
+    progress = ProgressLog(path, {"games": 10})
+    progress.append(progress.seed(0))
+    progress.close()
+
+    with open(path, "a", encoding="utf-8") as file:
+        file.write('{"seed": ')
+
+    resumed = ProgressLog(path, {"games": 10})
+    resumed.append(resumed.seed(1))
+    resumed.close()
+
+    assert set(ProgressLog(path, {"games": 10}).entries) == {
+        progress.seed(0),
+        progress.seed(1),
+    }
+
+    # A header cut off by a crash starts the run over
+    with open(path, "w", encoding="utf-8") as file:
+        file.write('{"settings": ')
+
+    assert ProgressLog(path, {"games": 10}).entries == {}
+
+
+def test_header_without_metadata(tmp_path):
+    path = tmp_path / "progress.jsonl"
+    path.write_text(json.dumps({"settings": {"games": 10}, "base_seed": 7}) + "\n")
+
+    progress = ProgressLog(str(path), {"games": 10})
+    assert progress.base_seed == 7
+    assert progress.metadata == {}
+    progress.close()
@@ -1,10 +1,14 @@
+import argparse
 import time
 from constants import *
-from typing import Any, List, TypedDict, Dict, Union
-from evaluation import EvaluationVersion, load_player_eval
+from typing import Any, List, Tuple, TypedDict, Dict, Union
+from evaluation import EvaluationVersion, evaluation_module, load_player_eval
 from game import Game
 from search import get_best_move
-import multiprocessing
+from workers import create_pool
+from checkpoint import ProgressLog
+from game_record import GameRecord, add_move, append_record, new_record
+from profiling import Profiler
 import random
 import json
 from tqdm import tqdm
@@ -16,10 +20,6 @@ class Score(TypedDict):
     ties: int
 
 
-def unpack(args: List[Any]):
-    return play_game(*args)
-
-
 # Returns the score difference (positive means player 1 wins)
 def play_game(
     move_time: float,
@@ -28,12 +28,24 @@ def play_game(
     seed: Union[int, None] = None,
     first_player: Union[int, None] = None,
     depth_limit: Union[int, None] = None,
+    record: Union[GameRecord, None] = None,
+    futility_margins: Tuple[Union[float, None], Union[float, None]] = (
+        FUTILITY_MARGIN,
+        FUTILITY_MARGIN,
+    ),
 ) -> int:
     if first_player is not None:
         turn = first_player
     else:
         turn = random.randint(0, 1)
 
+    # A recorded game needs a seed to be replayed
+    if record is not None:
+        if seed is None:
+            seed = random.getrandbits(32)
+        record["seed"] = seed
+        record["first_player"] = turn
+
     game = Game(seed=seed)
 
     while not game.is_game_over():
@@ -42,6 +54,7 @@ def play_game(
             turn = game.new_round()
 
         else:
+            start_time = time.perf_counter()
             result = get_best_move(
                 player1_eval,
                 player2_eval,
@@ -50,45 +63,160 @@ def play_game(
                 move_time,
                 show_progress=False,
                 depth_limit=depth_limit,
+                collect_stats=record is not None,
+                futility_margin=futility_margins[turn],
             )
+
+            if record is not None and result.stats is not None:
+                add_move(
+                    record,
+                    result.move,
+                    result.score,
+                    result.nodes_searched,
+                    result.stats.completed_depth,
+                    time.perf_counter() - start_time,
+                )
+
             game.make_move(turn, result.move)
             turn = (turn + 1) % 2
 
+    if record is not None:
+        record["result"] = game.players[0].points - game.players[1].points
+
     return game.players[0].points - game.players[1].points
 
 
+def unpack(args: List[Any]):
+    seed, first_player, recording, names, futility_margins, *play_args = args
+    record = new_record(seed, first_player, names) if recording else None
+
+    # The worker saves the record, so a game that crashes keeps the moves played so far
+    try:
+        result = play_game(
+            *play_args,
+            seed=seed,
+            first_player=first_player,
+            record=record,
+            futility_margins=futility_margins,
+        )
+    except Exception as error:
+        if record is not None:
+            record["error"] = repr(error)
+        raise
+    finally:
+        if record is not None:
+            append_record(record)
+
+    return seed, result
+
+
+# Searches with futility pruning are counted as their own player
+def player_name(version: str, futility_margin: Union[float, None]) -> str:
+    if futility_margin is None:
+        return version
+
+    return f"{version} futility {futility_margin:g}"
+
+
+def tally(results: List[int]) -> Score:
+    return {
+        "player1_wins": sum(1 for result in results if result > 0),
+        "player2_wins": sum(1 for result in results if result < 0),
+        "ties": sum(1 for result in results if result == 0),
+    }
+
+
+def score_text(score: Score) -> str:
+    return f"{score['player1_wins']}-{score['player2_wins']}-{score['ties']}"
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Play the versions in PLAYER1_COMPARE_VERSION and PLAYER2_COMPARE_VERSION against each other"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help=f"Profile every worker and save the merged results in {PROFILE_DIRECTORY}/",
+    )
+    parser.add_argument(
+        "--record",
+        action="store_true",
+        help=f"Save the moves of every game in {GAME_RECORD_FILE}, including games that crash",
+    )
+    parser.add_argument(
+        "--futility-margins",
+        nargs=2,
+        default=[FUTILITY_MARGIN, FUTILITY_MARGIN],
+        type=lambda margin: None if margin == "none" else float(margin),
+        metavar=("PLAYER1", "PLAYER2"),
+        help="Futility pruning margin of each player, none turns pruning off (default: FUTILITY_MARGIN)",
+    )
+    args = parser.parse_args()
+
+    futility_margins = tuple(args.futility_margins)
+    names = [
+        player_name(PLAYER1_COMPARE_VERSION, futility_margins[0]),
+        player_name(PLAYER2_COMPARE_VERSION, futility_margins[1]),
+    ]
+
+    profiler = Profiler() if args.profile else None
+
     player1_eval = load_player_eval(PLAYER1_COMPARE_VERSION)
     player2_eval = load_player_eval(PLAYER2_COMPARE_VERSION)
 
-    player1_wins = 0
-    player2_wins = 0
-    ties = 0
+    # Finished games are logged as they complete, so an interrupted run resumes where it stopped
+    progress = ProgressLog(
+        COMPARE_PROGRESS_FILE,
+        {
+            "player1": names[0],
+            "player2": names[1],
+            "move_time": COMPARE_COMPUTER_MOVE_TIME,
+            "rounds": NUM_COMPARE_ROUNDS,
+        },
+    )
+
+    results: List[int] = [entry["result"] for entry in progress.entries.values()]
+
+    # Each seed is played once, and the first player alternates between games
+    remaining = [
+        [
+            progress.seed(index),
+            index % 2,
+            args.record,
+            names,
+            futility_margins,
+            COMPARE_COMPUTER_MOVE_TIME,
+            player1_eval,
+            player2_eval,
+        ]
+        for index in range(NUM_COMPARE_ROUNDS)
+        if not progress.is_done(progress.seed(index))
+    ]
 
-    # Play NUM_COMPARE_ROUNDS games in parallel and record the results
-    with multiprocessing.Pool() as pool:
+    # Play the remaining games in parallel and record the results
+    with create_pool(
+        preload=[evaluation_module(player1_eval), evaluation_module(player2_eval)]
+    ) as pool:
         progress_bar = tqdm(
-            pool.imap(
-                unpack,
-                [
-                    [COMPARE_COMPUTER_MOVE_TIME, player1_eval, player2_eval]
-                    for _ in range(NUM_COMPARE_ROUNDS)
-                ],
+            pool.imap_unordered(
+                unpack if profiler is None else profiler.wrap(unpack), remaining
             ),
             total=NUM_COMPARE_ROUNDS,
-            postfix={"Score": f"{player1_wins}-{player2_wins}-{ties}"},
+            initial=len(results),
+            postfix={"Score": score_text(tally(results))},
         )
 
-        for result in progress_bar:
-            if result == 0:
-                ties += 1
-            elif result > 0:
-                player1_wins += 1
-            elif result < 0:
-                player2_wins += 1
+        for seed, result in progress_bar:
+            progress.append(seed, result=result)
+            results.append(result)
 
-            progress_bar.set_postfix({"Score": f"{player1_wins}-{player2_wins}-{ties}"})
+            progress_bar.set_postfix({"Score": score_text(tally(results))})
 
+    if profiler is not None:
+        profiler.report()
+
+    score = tally(results)
     file = open("compare.json", "r+", encoding="utf-8")
 
     # Information stored as a dictionary of different combinations of versions eg. (v1,v2)
@@ -97,30 +225,35 @@ if __name__ == "__main__":
     player1_version_number = int(PLAYER1_COMPARE_VERSION[1:])
     player2_version_number = int(PLAYER2_COMPARE_VERSION[1:])
 
-    smaller_version_number = min(player1_version_number, player2_version_number)
-    larger_version_number = max(player1_version_number, player2_version_number)
-    version_combination = f"v{larger_version_number},v{smaller_version_number}"
+    # Larger version first
+    version_combination = ",".join(
+        name
+        for _, name in sorted(
+            [(player1_version_number, names[0]), (player2_version_number, names[1])],
+            reverse=True,
+        )
+    )
 
     # Add the new information to the dictionary
     if version_combination not in current_text:
-        current_text[version_combination] = {
-            "player1_wins": player1_wins,
-            "player2_wins": player2_wins,
-            "ties": ties,
-        }
+        current_text[version_combination] = score
     else:
-        current_text[version_combination]["player1_wins"] += player1_wins
-        current_text[version_combination]["player2_wins"] += player2_wins
-        current_text[version_combination]["ties"] += ties
+        current_text[version_combination]["player1_wins"] += score["player1_wins"]
+        current_text[version_combination]["player2_wins"] += score["player2_wins"]
+        current_text[version_combination]["ties"] += score["ties"]
 
     # Overwrite the existing file
     file.seek(0)
     json.dump(current_text, file, ensure_ascii=False, indent=2)
     file.truncate()
+    file.close()
+
+    # The results are now part of compare.json, so the run is complete
+    progress.remove()
 
     print(
-        f"Player 1 Wins: {player1_wins}",
-        f"Player 2 Wins: {player2_wins}",
-        f"Ties: {ties}",
+        f"Player 1 Wins: {score['player1_wins']}",
+        f"Player 2 Wins: {score['player2_wins']}",
+        f"Ties: {score['ties']}",
         sep="\n",
     )
@@ -0,0 +1,16 @@
+import pytest
+from pytest_benchmark.utils import parse_compare_fail
+
+
+# Comparing against a saved baseline fails when a benchmark's fastest run is this much slower
+BENCHMARK_REGRESSION_THRESHOLD = "min:10%"
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config: pytest.Config) -> None:
+    if config.getoption("benchmark_compare") and not config.getoption(
+        "benchmark_compare_fail"
+    ):
+        config.option.benchmark_compare_fail = [
+            parse_compare_fail(BENCHMARK_REGRESSION_THRESHOLD)
+        ]
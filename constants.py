@@ -3,18 +3,55 @@ from typing import Literal, List, Dict, Tuple, Union
 
 COMPUTER_MOVE_TIME = 5  # seconds
 EVALUATION_VERSION = "v4"
+# Searches score positions in whole 1/resolution points, eg. 100 (None keeps the evaluation's own floats)
+EVALUATION_RESOLUTION: Union[int, None] = None
+# Skips the moves of nodes above the leaves when the points a move can gain or lose (plus this margin)
+# can't bring the score inside the search window (None turns futility pruning off)
+FUTILITY_MARGIN: Union[float, None] = None
 
 
 COMPARE_COMPUTER_MOVE_TIME = 0.1  # seconds
 NUM_COMPARE_ROUNDS = 500
 PLAYER1_COMPARE_VERSION = "v3"
 PLAYER2_COMPARE_VERSION = "v2"
+COMPARE_PROGRESS_FILE = "compare_progress.jsonl"
+POSITIONS_PROGRESS_FILE = "data_points_progress.jsonl"
+DATASET_DIRECTORY = "data_points"
+DATASET_SHARD_SIZE = 100000
+POSITION_STORE_FILE = "positions.bin"
+GAME_RECORD_FILE = "games.jsonl"
+REPLAY_DIRECTORY = "replays"
+REPLAY_CHUNK_PLIES = 10  # plies rendered by one worker task
+
+# Multiprocessing workers (a pool size of None uses every available CPU)
+WORKER_POOL_SIZE: Union[int, None] = None
+WORKER_TORCH_THREADS = 1
+PIN_WORKER_CPUS = False
+# Start method of pool workers and engine processes (None is the platform default)
+# A fork server imports the engine once, so a new process starts without importing anything
+StartMethod = Literal["fork", "spawn", "forkserver"]
+WORKER_START_METHOD: Union[StartMethod, None] = None
+ENGINE_START_METHOD: Union[StartMethod, None] = "forkserver"
+
+# Rating ladder
+TOURNAMENT_DATABASE = "results.db"
+INITIAL_ELO = 1500
+ELO_K_FACTOR = 16
+
+# Profiling mode of compare.py and generate_positions.py
+PROFILE_DIRECTORY = "profile"
+PROFILE_SAMPLE_INTERVAL = 0.005
 
 FACTORY_COUNT = 5
 NUM_EACH_TILE = 20
 TILES_PER_FACTORY = 4
 WALL_SIZE = 5
 NEGATIVE_FLOOR_POINTS = [1, 1, 2, 2, 2, 3, 3]
+
+# Binary snapshots (Game.to_bytes), the version changes whenever the layout does
+SNAPSHOT_VERSION = 1
+# A player can take every tile of a round plus the starting marker onto their floor
+SNAPSHOT_FLOOR_SIZE = TILES_PER_FACTORY * FACTORY_COUNT + 1
 HORIZONTAL_LINE_BONUS = 2
 VERTICAL_LINE_BONUS = 7
 FIVE_OF_A_KIND_BONUS = 10
@@ -40,13 +77,17 @@ FONT_FILE_NAME = "pixelized"
 FLOOR_FONT_SIZE = 15
 MAIN_FONT_SIZE = 25
 FADED_IMAGE_ALPHA = 65
+# Shows the engine's depth, score, best move and speed while it searches (battle.py and play.py)
+SHOW_ANALYSIS = False
+ANALYSIS_LINE_SPACING = 3
 
 # Data piping constants
-CURRENT_BEST = "current_best"
 BEST_MOVE = "best_move"
-DEPTH = "depth"
-EVALUATION = "evaluation"
-DataType = Literal["current_best", "best_move", "depth", "evaluation"]
+SEARCH_STATS = "search_stats"
+TELEMETRY = "telemetry"
+DataType = Literal["best_move", "search_stats", "telemetry"]
+# Progress of a search is coalesced into at most this many messages per second
+TELEMETRY_RATE = 10
 
 EMPTY = 0
 BLUE = 1
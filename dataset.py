@@ -0,0 +1,269 @@
+import json
+import os
+from constants import *
+from typing import Any, Dict, Iterator, List, Literal, Tuple, Union
+import numpy as np
+
+
+# Length of Game.features, the first column of every record is the difference of Game.basic_points
+FEATURE_COUNT = (
+    1
+    + 2
+    * (
+        (FACTORY_COUNT + 1) * len(TILE_TYPES)
+        + 1
+        + 3 * WALL_SIZE
+        + WALL_SIZE * WALL_SIZE
+        + 2
+    )
+    + 1
+)
+# Every record is the features followed by the search score
+RECORD_WIDTH = FEATURE_COUNT + 1
+RECORD_DTYPE = np.float32
+# Version 2 added the first round bonus to the basic points, so older datasets disagree with the v4 evaluation
+FEATURE_VERSION = 2
+
+MANIFEST_FILE = "manifest.json"
+PARTIAL_SHARD_FILE = "partial.bin"
+PENDING_SHARD_EXTENSION = ".pending"
+
+DataPoint = Tuple[List[float], float]
+
+
+# Writes records into .npy shards of about shard_size rows (one write is never split), listed in manifest.json
+# Records are first appended to a raw partial shard, so everything written survives a crash
+class ShardWriter:
+    def __init__(
+        self,
+        directory: str = DATASET_DIRECTORY,
+        shard_size: int = DATASET_SHARD_SIZE,
+        *,
+        feature_version: int = FEATURE_VERSION,
+    ) -> None:
+        self.directory = directory
+        self.shard_size = shard_size
+
+        os.makedirs(directory, exist_ok=True)
+        self.manifest = read_manifest(directory, feature_version)
+
+        # A crash while finishing a shard leaves its rows in a pending file
+        for file_name in sorted(os.listdir(directory)):
+            if file_name.endswith(PENDING_SHARD_EXTENSION):
+                self.save_shard(os.path.join(directory, file_name))
+
+        self.partial_path = os.path.join(directory, PARTIAL_SHARD_FILE)
+        self.partial = open(self.partial_path, "ab")
+
+    @property
+    def partial_rows(self) -> int:
+        return os.path.getsize(self.partial_path) // (
+            RECORD_WIDTH * np.dtype(RECORD_DTYPE).itemsize
+        )
+
+    @property
+    def rows(self) -> int:
+        return (
+            sum(shard["rows"] for shard in self.manifest["shards"]) + self.partial_rows
+        )
+
+    # Discards records written after the last known good state (eg. a game that was never logged)
+    def truncate(self, rows: int) -> None:
+        shards = self.manifest["shards"]
+        finished_rows = sum(shard["rows"] for shard in shards)
+
+        # A shard finished after that state goes back into the partial shard, then that is cut
+        # If this is interrupted, the manifest still lists the shard and it is simply done again
+        while finished_rows > rows:
+            shard = shards[-1]
+            shard_path = os.path.join(self.directory, shard["file"])
+
+            self.partial.truncate(0)
+            self.partial.write(np.load(shard_path).tobytes())
+            self.sync()
+
+            shards.pop()
+            write_manifest(self.directory, self.manifest)
+            os.remove(shard_path)
+
+            finished_rows -= shard["rows"]
+
+        self.partial.truncate(
+            (rows - finished_rows) * RECORD_WIDTH * np.dtype(RECORD_DTYPE).itemsize
+        )
+
+    def write(self, data_points: List[DataPoint]) -> None:
+        if len(data_points) == 0:
+            return
+
+        records = np.empty((len(data_points), RECORD_WIDTH), dtype=RECORD_DTYPE)
+        for index, (features, score) in enumerate(data_points):
+            records[index, :FEATURE_COUNT] = features
+            records[index, FEATURE_COUNT] = score
+
+        self.partial.write(records.tobytes())
+        self.sync()
+
+        if self.partial_rows >= self.shard_size:
+            self.finish_shard()
+
+    def sync(self) -> None:
+        self.partial.flush()
+        os.fsync(self.partial.fileno())
+
+    # Turns the partial shard into a numbered .npy shard
+    # It is renamed before the manifest lists the shard, so a crash can't leave its rows in both
+    def finish_shard(self) -> None:
+        if self.partial_rows == 0:
+            return
+
+        pending_path = os.path.join(
+            self.directory,
+            f"shard_{len(self.manifest['shards']):05d}{PENDING_SHARD_EXTENSION}",
+        )
+
+        self.partial.close()
+        os.replace(self.partial_path, pending_path)
+        self.partial = open(self.partial_path, "ab")
+
+        self.save_shard(pending_path)
+
+    # Saves a pending file as the shard of the same name, unless the manifest already lists it
+    def save_shard(self, pending_path: str) -> None:
+        file_name = os.path.basename(pending_path)[: -len(PENDING_SHARD_EXTENSION)]
+        file_name += ".npy"
+
+        if all(shard["file"] != file_name for shard in self.manifest["shards"]):
+            records = np.fromfile(pending_path, dtype=RECORD_DTYPE).reshape(
+                -1, RECORD_WIDTH
+            )
+            np.save(os.path.join(self.directory, file_name), records)
+
+            self.manifest["shards"].append({"file": file_name, "rows": len(records)})
+            write_manifest(self.directory, self.manifest)
+
+        os.remove(pending_path)
+
+    def close(self, *, finish: bool = True) -> None:
+        if finish:
+            self.finish_shard()
+
+        self.partial.close()
+
+
+def read_manifest(
+    directory: str, feature_version: int = FEATURE_VERSION
+) -> Dict[str, Any]:
+    path = os.path.join(directory, MANIFEST_FILE)
+
+    if not os.path.exists(path):
+        return {
+            "feature_count": FEATURE_COUNT,
+            "feature_version": feature_version,
+            "shards": [],
+        }
+
+    with open(path, "r", encoding="utf-8") as file:
+        manifest = json.load(file)
+
+    if manifest["feature_count"] != FEATURE_COUNT:
+        raise Exception(
+            f"{directory} stores {manifest['feature_count']} features, expected {FEATURE_COUNT}"
+        )
+
+    if manifest.get("feature_version", 1) != feature_version:
+        raise Exception(
+            f"{directory} stores version {manifest.get('feature_version', 1)} features, expected {feature_version}"
+        )
+
+    return manifest
+
+
+def write_manifest(directory: str, manifest: Dict[str, Any]) -> None:
+    # Written to a temporary file first so the manifest is never half written
+    path = os.path.join(directory, MANIFEST_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=2)
+        file.flush()
+        os.fsync(file.fileno())
+
+    os.replace(path + ".tmp", path)
+
+
+# Memory-maps every finished shard, nothing is read until the arrays are indexed
+def load_shards(directory: str = DATASET_DIRECTORY) -> List[np.ndarray]:
+    return [
+        np.load(os.path.join(directory, shard["file"]), mmap_mode="r")
+        for shard in read_manifest(directory)["shards"]
+    ]
+
+
+# Deterministic split of a shard's rows, so every job agrees on which rows are held out
+def split_rows(
+    shard_index: int,
+    num_rows: int,
+    split: Literal["train", "validation"],
+    validation_fraction: float,
+) -> np.ndarray:
+    rows = np.arange(num_rows)
+    buckets = (rows * 2654435761 + shard_index * 40503) % 1000
+    is_validation = buckets < validation_fraction * 1000
+
+    return rows[is_validation] if split == "validation" else rows[~is_validation]
+
+
+# Yields (features, scores) batches, optionally shuffled within each shard
+def iterate_batches(
+    directory: str = DATASET_DIRECTORY,
+    batch_size: int = 1024,
+    *,
+    shuffle: bool = False,
+    shards: Union[List[int], None] = None,
+    seed: Union[int, None] = None,
+    split: Union[Literal["train", "validation"], None] = None,
+    validation_fraction: float = 0.1,
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    random_generator = np.random.default_rng(seed)
+    all_shards = load_shards(directory)
+
+    shard_order = list(range(len(all_shards))) if shards is None else list(shards)
+    if shuffle:
+        random_generator.shuffle(shard_order)
+
+    for shard_index in shard_order:
+        shard = all_shards[shard_index]
+
+        if split is None:
+            order = np.arange(len(shard))
+        else:
+            order = split_rows(shard_index, len(shard), split, validation_fraction)
+
+        if shuffle:
+            order = random_generator.permutation(order)
+
+        for start in range(0, len(order), batch_size):
+            batch = np.asarray(shard[np.sort(order[start : start + batch_size])])
+            yield batch[:, :FEATURE_COUNT], batch[:, FEATURE_COUNT]
+
+
+# Converts the old data_points.txt text format into shards
+# Its basic points have no first round bonus, so the shards are version 1 features
+def convert_text_file(
+    path: str = "data_points.txt", directory: str = DATASET_DIRECTORY
+) -> None:
+    writer = ShardWriter(directory, feature_version=1)
+
+    with open(path, "r") as file:
+        data_points: List[DataPoint] = []
+
+        for line in file:
+            features, score = line.split()
+            data_points.append((list(map(int, features.split(","))), float(score)))
+
+            if len(data_points) == writer.shard_size:
+                writer.write(data_points)
+                data_points = []
+
+        writer.write(data_points)
+
+    writer.close()
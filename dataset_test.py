@@ -0,0 +1,144 @@
+from constants import *
+import os
+import numpy as np
+import pytest
+from dataset import (
+    FEATURE_COUNT,
+    PARTIAL_SHARD_FILE,
+    PENDING_SHARD_EXTENSION,
+    ShardWriter,
+    iterate_batches,
+    read_manifest,
+    split_rows,
+)
+
+
+def data_points(start: int, count: int):
+    return [
+        ([index] * FEATURE_COUNT, index / 2) for index in range(start, start + count)
+    ]
+
+
+def all_scores(directory: str):
+    return [
+        score
+        for _, scores in iterate_batches(directory, batch_size=3)
+        for score in scores
+    ]
+
+
+def test_round_trip(tmp_path):
+    directory = str(tmp_path)
+    writer = ShardWriter(directory, shard_size=4)
+
+    # A write is never split, so the first shard has 5 rows
+    writer.write(data_points(0, 3))
+    writer.write(data_points(3, 2))
+    writer.write(data_points(5, 2))
+    assert writer.rows == 7
+    assert writer.partial_rows == 2
+    writer.close()
+
+    assert [shard["rows"] for shard in read_manifest(directory)["shards"]] == [5, 2]
+
+    batches = list(iterate_batches(directory, batch_size=3))
+    assert [len(scores) for _, scores in batches] == [3, 2, 2]
+
+    features = np.concatenate([features for features, _ in batches])
+    assert features.shape == (7, FEATURE_COUNT)
+    assert list(features[:, 0]) == list(range(7))
+    assert all_scores(directory) == [index / 2 for index in range(7)]
+
+
+def test_resume_after_truncate(tmp_path):
+    directory = str(tmp_path)
+    writer = ShardWriter(directory, shard_size=4)
+    writer.write(data_points(0, 2))
+    # Interrupted after finishing a shard, but before the game was logged
+    writer.write(data_points(2, 3))
+    writer.close(finish=False)
+
+    writer = ShardWriter(directory, shard_size=4)
+    writer.truncate(3)
+    assert writer.rows == 3
+    assert read_manifest(directory)["shards"] == []
+
+    writer.write(data_points(3, 1))
+    writer.close()
+
+    assert all_scores(directory) == [index / 2 for index in range(4)]
+
+
+def test_resume_while_finishing_shard(tmp_path):
+    directory = str(tmp_path)
+    writer = ShardWriter(directory, shard_size=10)
+    writer.write(data_points(0, 3))
+    writer.close(finish=False)
+
+    # Crash after the partial shard was renamed, before the manifest listed it
+    os.replace(
+        os.path.join(directory, PARTIAL_SHARD_FILE),
+        os.path.join(directory, f"shard_00000{PENDING_SHARD_EXTENSION}"),
+    )
+
+    writer = ShardWriter(directory, shard_size=10)
+    assert writer.rows == 3
+    writer.truncate(3)
+    writer.close()
+
+    assert all_scores(directory) == [index / 2 for index in range(3)]
+    assert not any(
+        file_name.endswith(PENDING_SHARD_EXTENSION)
+        for file_name in os.listdir(directory)
+    )
+
+
+def test_rejects_other_feature_versions(tmp_path):
+    directory = str(tmp_path)
+    writer = ShardWriter(directory, feature_version=1)
+    writer.write(data_points(0, 1))
+    writer.close()
+
+    with pytest.raises(Exception, match="version 1 features"):
+        ShardWriter(directory)
+
+
+def test_split_rows():
+    train = split_rows(3, 1000, "train", 0.1)
+    validation = split_rows(3, 1000, "validation", 0.1)
+
+    assert np.array_equal(validation, split_rows(3, 1000, "validation", 0.1))
+    assert sorted([*train, *validation]) == list(range(1000))
+    assert 50 < len(validation) < 150
+
+    # A longer shard keeps the split of its first rows
+    assert np.array_equal(
+        split_rows(3, 2000, "validation", 0.1)[: len(validation)], validation
+    )
+
+
+def test_shuffled_batches(tmp_path):
+    directory = str(tmp_path)
+    writer = ShardWriter(directory, shard_size=5)
+    for start in range(0, 20, 5):
+        writer.write(data_points(start, 5))
+    writer.close()
+
+    def scores(seed: int, split: str):
+        return [
+            score
+            for _, batch_scores in iterate_batches(
+                directory,
+                batch_size=4,
+                shuffle=True,
+                seed=seed,
+                split=split,  # type: ignore
+                validation_fraction=0.3,
+            )
+            for score in batch_scores
+        ]
+
+    assert scores(0, "train") == scores(0, "train")
+    assert sorted([*scores(0, "train"), *scores(0, "validation")]) == [
+        index / 2 for index in range(20)
+    ]
@@ -0,0 +1,327 @@
+from constants import *
+from typing import Literal, Union
+from evaluation import EvaluationVersion, evaluation_module
+from game import Game, Move, PartialMove
+from game_record import GameRecord, add_move, append_record
+from animation import Animation
+import graphics
+from search import ConnectionData, FinalResult, Telemetry, get_best_move
+from workers import get_context
+from multiprocessing.connection import Connection
+from multiprocessing.context import BaseContext
+import threading
+import time
+import pygame
+
+
+# Events posted by the engine reader thread and the timers, the loop sleeps until one of these
+# (or a window/mouse event) arrives
+ENGINE_MESSAGE = pygame.event.custom_type()
+ANIMATION_FRAME = pygame.event.custom_type()
+PAUSE_OVER = pygame.event.custom_type()
+
+HANDLED_EVENTS = [
+    pygame.QUIT,
+    pygame.MOUSEMOTION,
+    pygame.MOUSEBUTTONUP,
+    pygame.WINDOWEXPOSED,
+    ENGINE_MESSAGE,
+    ANIMATION_FRAME,
+    PAUSE_OVER,
+]
+
+
+# Searches for a move in another process, a thread turns everything it sends into pygame events
+class EngineSearch:
+    def __init__(
+        self,
+        context: BaseContext,
+        eval_version: EvaluationVersion,
+        game: Game,
+        turn: int,
+        *,
+        collect_stats: bool = False,
+    ) -> None:
+        self.start_time = time.perf_counter()
+        self.parent_connection, child_connection = context.Pipe()
+
+        self.process = context.Process(
+            target=get_best_move,
+            args=(eval_version, eval_version, game, turn, COMPUTER_MOVE_TIME),
+            kwargs={"connection": child_connection, "collect_stats": collect_stats},
+            daemon=True,
+        )
+        self.process.start()
+        # Only the search process writes, so the reader sees the end of the pipe when it exits
+        child_connection.close()
+
+        self.reader = threading.Thread(
+            target=self.read_messages, args=(self.parent_connection,), daemon=True
+        )
+        self.reader.start()
+
+    def read_messages(self, connection: Connection) -> None:
+        try:
+            while True:
+                result: ConnectionData = connection.recv()
+                pygame.event.post(
+                    pygame.event.Event(ENGINE_MESSAGE, result=result, search=self)
+                )
+        except (EOFError, OSError):
+            pass
+
+    def stop(self) -> None:
+        self.process.kill()
+        self.process.join()
+        self.reader.join()
+        self.parent_connection.close()
+
+
+# Runs a game in a window, players without a human are played by the engine
+# Only the first player can be human, since the graphics only handle input for the bottom board
+# With a record (of a game created with its seed), every move is added to it and it is saved when the window closes
+class GameDriver:
+    def __init__(
+        self,
+        game: Game,
+        graphics_info: graphics.GraphicsInfo,
+        eval_version: EvaluationVersion,
+        *,
+        human_player: Union[int, None] = None,
+        pause_after_move: float = 0,
+        show_analysis: bool = False,
+        record: Union[GameRecord, None] = None,
+    ) -> None:
+        self.game = game
+        self.new_game = game.copy()
+        self.graphics_info = graphics_info
+        self.eval_version = eval_version
+        self.human_player = human_player
+        self.pause_after_move = pause_after_move
+        self.show_analysis = show_analysis
+        self.record = record
+        # Every move is searched in a new process, a fork server has the engine imported already
+        self.context = get_context(
+            ENGINE_START_METHOD, preload=[evaluation_module(eval_version)]
+        )
+
+        self.turn = 0
+        self.end = False
+        self.paused = False
+        self.animation: Union[Animation, None] = None
+        self.search: Union[EngineSearch, None] = None
+        # Latest telemetry of the engine's search, kept until the next search starts
+        self.analysis: Union[Telemetry, None] = None
+
+        self.choice: Literal["tile", "line", None] = (
+            "tile" if human_player == 0 else None
+        )
+        self.partial: Union[PartialMove, None] = None
+        # When the human player started choosing their move
+        self.choice_start_time = time.perf_counter()
+
+        # Set whenever something on screen may have changed
+        self.needs_render = True
+
+    def run(self) -> None:
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed(HANDLED_EVENTS)
+
+        # An unfinished or crashed game is saved with the moves played so far
+        try:
+            self.advance()
+
+            while True:
+                # Animation frames are rendered by their timer
+                if self.needs_render and self.animation is None:
+                    self.needs_render = False
+                    self.render()
+
+                event = pygame.event.wait()
+
+                if event.type == pygame.QUIT:
+                    break
+
+                self.handle_event(event)
+        except Exception as error:
+            if self.record is not None:
+                self.record["error"] = repr(error)
+            raise
+        finally:
+            if self.search:
+                self.search.stop()
+
+            if self.record is not None:
+                append_record(self.record)
+
+    def handle_event(self, event: pygame.event.Event) -> None:
+        if event.type == pygame.MOUSEMOTION:
+            # Hovered tiles and lines are only shown while choosing a move
+            if self.choice is not None:
+                self.needs_render = True
+
+        elif event.type == pygame.MOUSEBUTTONUP:
+            self.click()
+
+        elif event.type == pygame.WINDOWEXPOSED:
+            pygame.display.flip()
+
+        elif event.type == ANIMATION_FRAME and self.animation:
+            if self.animation.finished:
+                self.finish_animation()
+            else:
+                dirty_rects = graphics.render_game(
+                    self.game,
+                    self.graphics_info,
+                    no_tiles_but_wall=True,
+                    analysis=self.analysis,
+                )
+                pygame.display.update(dirty_rects + self.animation.render())
+
+                self.animation.update()
+
+        elif event.type == PAUSE_OVER:
+            self.paused = False
+            self.advance()
+
+        elif event.type == ENGINE_MESSAGE and event.search is self.search:
+            result: ConnectionData = event.result
+
+            if result["type"] == TELEMETRY and self.show_analysis:
+                self.analysis = result["data"]
+                self.needs_render = True
+
+            elif result["type"] == BEST_MOVE:
+                data: FinalResult = result["data"]
+
+                if self.search:
+                    self.search.stop()
+                    self.search = None
+
+                if self.record is not None:
+                    add_move(
+                        self.record,
+                        data.move,
+                        data.score,
+                        data.nodes_searched,
+                        None if data.stats is None else data.stats.completed_depth,
+                        time.perf_counter() - event.search.start_time,
+                    )
+
+                self.play_move(data.move)
+
+    def render(self) -> None:
+        pygame.display.update(
+            graphics.render_game(
+                self.game,
+                self.graphics_info,
+                player_choice=self.choice,
+                partial_tile_move=self.partial,
+                analysis=self.analysis,
+            )
+        )
+
+    def click(self) -> None:
+        if self.turn != self.human_player or self.animation:
+            return
+
+        if self.choice == "tile":
+            partial_move = graphics.get_hovered_partial_move(
+                self.game, graphics.get_position_index(self.graphics_info, self.game)
+            )
+            if partial_move:
+                self.choice = "line"
+                self.partial = partial_move
+                self.needs_render = True
+
+        elif self.choice == "line" and self.partial:
+            move = graphics.get_hovered_move(self.game, self.partial)
+            if move:
+                self.choice, self.partial = None, None
+
+                if self.record is not None:
+                    add_move(
+                        self.record,
+                        move,
+                        None,
+                        None,
+                        None,
+                        time.perf_counter() - self.choice_start_time,
+                    )
+
+                self.play_move(move)
+
+    def play_move(self, move: Move) -> None:
+        self.game.make_move(self.turn, move)
+        self.new_game = self.game.copy()
+        self.game.undo_move(self.turn, move)
+
+        self.start_animation(move)
+        self.turn = (self.turn + 1) % 2
+
+    def start_animation(self, move: Union[Move, None]) -> None:
+        self.animation = Animation(
+            self.turn, self.game, move, self.new_game, self.graphics_info
+        )
+        pygame.time.set_timer(ANIMATION_FRAME, 1000 // FRAME_RATE)
+
+    def finish_animation(self) -> None:
+        pygame.time.set_timer(ANIMATION_FRAME, 0)
+        self.animation = None
+
+        # If the animation is over and the round is over, start a new round
+        if self.game.is_round_over():
+            self.game = self.new_game.copy()
+
+            # If the game is over, the final score is already calculated
+            if self.game.is_game_over():
+                self.end = True
+
+                if self.record is not None:
+                    self.record["result"] = (
+                        self.game.players[0].points - self.game.players[1].points
+                    )
+            else:
+                self.turn = self.game.new_round()
+
+        # If the animation is over, set the new game state for the next move
+        else:
+            self.game = self.new_game.copy()
+
+        if self.turn == self.human_player and not self.end:
+            self.choice = "tile"
+            self.choice_start_time = time.perf_counter()
+
+        self.needs_render = True
+
+        if self.pause_after_move > 0 and not self.end:
+            self.paused = True
+            pygame.time.set_timer(
+                PAUSE_OVER, int(self.pause_after_move * 1000), loops=1
+            )
+        else:
+            self.advance()
+
+    # Starts whatever happens next when nothing is animating
+    def advance(self) -> None:
+        if self.end or self.animation or self.paused:
+            return
+
+        # Start the wall tiling animation
+        if self.game.is_round_over():
+            self.new_game = self.game.copy()
+            self.new_game.calculate_points_and_modify()
+
+            self.render()
+            self.start_animation(None)
+
+        # Start the engine's search, a human's move starts with a click
+        elif self.turn != self.human_player and not self.search:
+            self.search = EngineSearch(
+                self.context,
+                self.eval_version,
+                self.game,
+                self.turn,
+                collect_stats=self.record is not None,
+            )
+            self.analysis = None
@@ -30,6 +30,11 @@ def load_player_eval(
     }
 
 
+# The module a loaded version comes from, so that new processes can import it before they need it
+def evaluation_module(version: EvaluationVersion) -> str:
+    return version["move_potential"].__module__
+
+
 # Evaluation always ranks the position from the point of view of player 1
 def game_evaluation(
     game: Game,
@@ -52,8 +57,15 @@ def game_evaluation_for_player(
     player2: Player,
     points_results: List[PointsResult],
     player_evaluation: Callable[[Game, Player, PointsResult], float],
+    resolution: Union[int, None] = None,
 ) -> float:
     multiplier = 1 if turn == 0 else -1
-    return multiplier * game_evaluation(
+    score = multiplier * game_evaluation(
         game, player1, player2, points_results, player_evaluation
     )
+
+    # Whole numbers of 1/resolution points, so no score fits inside a null window (alpha, alpha + 1)
+    if resolution is not None:
+        return round(score * resolution)
+
+    return score
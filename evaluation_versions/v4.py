@@ -4,10 +4,20 @@ from functools import partial
 from constants import *
 from game import Factory, Game, Move, PointChange, PointsResult
 from player import Player
-from genetic import base_model
 import torch
 import torch.nn as nn
-import pygad.torchga as torchga
+
+
+# The network of the v4 evaluation, shared with genetic.py and train.py
+def base_model() -> nn.Sequential:
+    return nn.Sequential(
+        nn.Linear(18, 64),
+        nn.Sigmoid(),
+        nn.Linear(64, 64),
+        nn.ReLU(),
+        nn.Linear(64, 1),
+        nn.ReLU(),
+    )
 
 
 # Decides how promising a move is
@@ -15,18 +25,8 @@ def move_potential(move: Move) -> float:
     return move.amount - len(move.floor_tiles)
 
 
-def nn_evaluation(
-    model: nn.Sequential, game: Game, player: Player, points_result: PointsResult
-) -> float:
-    basic_points = (
-        sum(
-            (change.points if change.completed else 0)
-            for change in points_result.point_changes
-        )
-        - points_result.negative_floor_points
-        + points_result.bonus_points
-    )
-
+# The 18 network inputs for a player, train.py computes the same inputs from dataset features
+def nn_inputs(game: Game, player: Player, points_result: PointsResult) -> List[float]:
     inputs: List[float] = []
 
     def get_point_change(row: int) -> Union[PointChange, None]:
@@ -36,12 +36,6 @@ def nn_evaluation(
 
         return None
 
-    # Give extra bonus for placing tiles in the middle on the first round
-    if game.is_first_round:
-        for change in points_result.point_changes:
-            if TILE_POSITIONS[change.tile][change.pattern_line] in [1, 2, 3]:
-                basic_points += 0.5
-
     total_tile_counts: Factory = Counter()
     for factory in [*game.factories, game.center_pile]:
         total_tile_counts += Counter(factory)
@@ -68,9 +62,16 @@ def nn_evaluation(
             most_tiles_in_row = max(most_tiles_in_row, tiles_in_row)
     inputs.append(WALL_SIZE - most_tiles_in_row)
 
+    return inputs
+
+
+def nn_evaluation(
+    model: nn.Sequential, game: Game, player: Player, points_result: PointsResult
+) -> float:
+    inputs = nn_inputs(game, player, points_result)
     result: torch.Tensor = model.forward(torch.Tensor(inputs))
 
-    return basic_points + result.item()
+    return game.basic_points(points_result) + result.item()
 
 
 def create_player_evaluation(
@@ -81,6 +82,9 @@ def create_player_evaluation(
     if nn_weights is None:
         state_dict = torch.load("nn_evaluation.pt")
     else:
+        # Only genetic.py passes weights, so pygad is not imported to play with the saved network
+        import pygad.torchga as torchga
+
         state_dict = torchga.model_weights_as_dict(model, nn_weights)
 
     model.load_state_dict(state_dict)
@@ -1,8 +1,8 @@
 from __future__ import annotations
 import json
 from constants import *
-from player import Player, PatternLine
-from typing import List, Union, Literal
+from player import Player, PatternLine, PlayerBonuses
+from typing import List, Tuple, Union, Literal
 from dataclasses import dataclass
 from collections import Counter
 import struct
@@ -10,13 +10,16 @@ import random
 import pickle
 
 
-move_counter = 0
-serialize_counter = 0
-points_counter = 0
-make_move_counter = 0
-no_move_counter = 0
 Factory = Counter[Union[Tile, Literal[6]]]
 
+# Layout of Game.to_bytes: version, flags, factories (3 bits per tile type), center pile,
+# then for each player: points, flags, pattern lines (tile and space), wall bits, bonus bits, floor length and floor (4 bits per tile)
+PLAYER_SNAPSHOT_FORMAT = f"hB{WALL_SIZE}BIHB{(SNAPSHOT_FLOOR_SIZE + 1) // 2}s"
+PLAYER_SNAPSHOT_VALUES = 2 + WALL_SIZE + 4
+SNAPSHOT = struct.Struct(
+    f"!BB{FACTORY_COUNT}H{len(TILE_TYPES)}B" + PLAYER_SNAPSHOT_FORMAT * 2
+)
+
 
 @dataclass(slots=True)
 class PartialMove:
@@ -65,6 +68,11 @@ class Game:
 
         self.is_first_round = True
 
+        # With a seed, every round is dealt from its own generator, so the deals don't depend on
+        # anything else that uses random (eg. the search) and a game can be replayed from its seed and moves
+        self.seed: Union[int, None] = seed
+        self.round = 0
+
         # Center pile starts empty (flagged for identification later)
         self.center_pile: Factory = Counter()
         self.center_pile[STARTING_MARKER] = 1
@@ -81,8 +89,8 @@ class Game:
 
         return copied_game
 
-    def random_tile(self) -> Tile:
-        return random.choice(TILE_TYPES)
+    def random_tile(self, generator: Union[random.Random, None] = None) -> Tile:
+        return (generator or random).choice(TILE_TYPES)  # type: ignore
 
     def get_factory_number(self, factory: Factory):
         return struct.pack(
@@ -164,19 +172,162 @@ class Game:
         self.factories = list(map(self.readable_factory_to_factory, json["factories"]))
         self.center_pile = self.readable_factory_to_factory(json["center_pile"])
 
-    def serialize(self, points_results: List[PointsResult]) -> str:
-        basic_points = 0
-        for player_index in [0, 1]:
-            points = (
+    # Fixed-size binary version of the position (see SNAPSHOT), unlike to_json it also stores the bonuses
+    def to_bytes(self, current_turn: Literal[0, 1]) -> bytes:
+        values: List[Union[int, bytes]] = [
+            SNAPSHOT_VERSION,
+            current_turn
+            | self.is_first_round << 1
+            | (self.center_pile[STARTING_MARKER] > 0) << 2,
+        ]
+
+        for factory in self.factories:
+            values.append(
                 sum(
-                    (change.points if change.completed else 0)
-                    for change in points_results[player_index].point_changes
+                    factory[tile] << (3 * index)
+                    for index, tile in enumerate(TILE_TYPES)
+                )
+            )
+
+        values.extend(self.center_pile[tile] for tile in TILE_TYPES)
+
+        for player in self.players:
+            if len(player.floor) > SNAPSHOT_FLOOR_SIZE:
+                raise Exception(
+                    f"Floor of {len(player.floor)} tiles does not fit in a snapshot"
+                )
+
+            floor = [*player.floor, 0]
+            bonuses = [
+                *player.bonuses.row,
+                *player.bonuses.col,
+                *player.bonuses.diagonal,
+            ]
+
+            values.extend(
+                [
+                    player.points,
+                    player.has_starting_marker,
+                    *(line.tile << 4 | line.space for line in player.pattern_lines),
+                    sum(
+                        filled << index
+                        for index, filled in enumerate(
+                            filled for row in player.wall for filled in row
+                        )
+                    ),
+                    sum(bonus << index for index, bonus in enumerate(bonuses)),
+                    len(player.floor),
+                    bytes(
+                        floor[index] << 4 | floor[index + 1]
+                        for index in range(0, len(player.floor), 2)
+                    ),
+                ]
+            )
+
+        return SNAPSHOT.pack(*values)
+
+    # Returns the game and whose turn it is
+    @staticmethod
+    def from_bytes(data: bytes) -> Tuple[Game, Literal[0, 1]]:
+        if len(data) == 0 or data[0] != SNAPSHOT_VERSION:
+            raise Exception(
+                f"Unsupported snapshot version {data[0] if len(data) > 0 else None}, expected {SNAPSHOT_VERSION}"
+            )
+
+        values = SNAPSHOT.unpack(data)
+        flags = values[1]
+
+        # Skip __init__, which would deal (and use the global random generator)
+        game = Game.__new__(Game)
+        game.is_first_round = bool(flags & 2)
+        # Later rounds are dealt from the global random generator, like an unseeded game
+        game.seed = None
+        game.round = 0
+
+        game.factories = []
+        for packed in values[2 : 2 + FACTORY_COUNT]:
+            factory: Factory = Counter()
+            for index, tile in enumerate(TILE_TYPES):
+                count = packed >> (3 * index) & 7
+                if count > 0:
+                    factory[tile] = count
+            game.factories.append(factory)
+
+        center_start = 2 + FACTORY_COUNT
+        game.center_pile = Counter(
+            {
+                tile: count
+                for tile, count in zip(
+                    TILE_TYPES, values[center_start : center_start + len(TILE_TYPES)]
+                )
+                if count > 0
+            }
+        )
+        if flags & 4:
+            game.center_pile[STARTING_MARKER] = 1
+
+        game.players = []
+        for index in [0, 1]:
+            start = center_start + len(TILE_TYPES) + index * PLAYER_SNAPSHOT_VALUES
+            points, has_starting_marker, *lines, wall, bonuses, floor_length, floor = (
+                values[start : start + PLAYER_SNAPSHOT_VALUES]
+            )
+
+            player = Player(index=index)
+            player.points = points
+            player.has_starting_marker = bool(has_starting_marker)
+            player.pattern_lines = [
+                PatternLine(tile=line >> 4, space=line & 15) for line in lines  # type: ignore
+            ]
+            player.wall = [
+                [bool(wall >> (row * WALL_SIZE + col) & 1) for col in range(WALL_SIZE)]
+                for row in range(WALL_SIZE)
+            ]
+            player.bonuses = PlayerBonuses(
+                *(
+                    [
+                        bool(bonuses >> (part * WALL_SIZE + i) & 1)
+                        for i in range(WALL_SIZE)
+                    ]
+                    for part in range(3)
                 )
-                - points_results[player_index].negative_floor_points
-                + points_results[player_index].bonus_points
             )
-            points *= -1 if player_index == 1 else 1
-            basic_points += points
+            player.floor = [
+                floor[i // 2] >> 4 if i % 2 == 0 else floor[i // 2] & 15  # type: ignore
+                for i in range(floor_length)
+            ]
+
+            game.players.append(player)
+
+        return game, flags & 1  # type: ignore
+
+    def serialize(self, points_results: List[PointsResult]) -> str:
+        return ",".join(map(str, self.features(points_results)))
+
+    # Points for finished lines, the floor and bonuses, with a bonus for central tiles on the first round
+    # The v4 evaluation and the datasets it is trained on both use this
+    def basic_points(self, points_result: PointsResult) -> float:
+        points: float = (
+            sum(
+                (change.points if change.completed else 0)
+                for change in points_result.point_changes
+            )
+            - points_result.negative_floor_points
+            + points_result.bonus_points
+        )
+
+        if self.is_first_round:
+            for change in points_result.point_changes:
+                if TILE_POSITIONS[change.tile][change.pattern_line] in [1, 2, 3]:
+                    points += 0.5
+
+        return points
+
+    # Fixed-width numeric description of the position, used for datasets
+    def features(self, points_results: List[PointsResult]) -> List[float]:
+        basic_points = self.basic_points(points_results[0]) - self.basic_points(
+            points_results[1]
+        )
 
         def get_point_change(player_index: int, row: int) -> Union[PointChange, None]:
             for change in points_results[player_index].point_changes:
@@ -185,7 +336,7 @@ class Game:
 
             return None
 
-        inputs: List[int] = [basic_points]
+        inputs: List[float] = [basic_points]
 
         for player_index, player in enumerate(self.players):
             for tile in TILE_TYPES:
@@ -218,7 +369,7 @@ class Game:
                 most_tiles_in_row = max(most_tiles_in_row, tiles_in_row)
         inputs.append(WALL_SIZE - most_tiles_in_row)
 
-        return ",".join(map(str, inputs))
+        return inputs
 
     # Round is over if factories and center pile are empty
     def is_round_over(self) -> bool:
@@ -240,8 +391,13 @@ class Game:
 
     # Reset all factories and the starting marker
     def new_round(self) -> Literal[0, 1]:
+        self.round += 1
+        generator = (
+            None if self.seed is None else random.Random(f"{self.seed}-{self.round}")
+        )
+
         for factory in self.factories:
-            tiles = [self.random_tile() for _ in range(TILES_PER_FACTORY)]
+            tiles = [self.random_tile(generator) for _ in range(TILES_PER_FACTORY)]
             for tile in TILE_TYPES:
                 count = tiles.count(tile)
                 if count > 0:
@@ -388,6 +544,110 @@ class Game:
 
         return bonus_points
 
+    # Bounds on how much the player's points this round (as calculate_points counts them) change with their next move
+    # The best move loses at most the floor points of the move that drops the fewest tiles, and no move gains more
+    # than the points of the best pattern line that one draw can complete
+    def move_point_bounds(self, player_index: int) -> Tuple[int, int]:
+        player = self.players[player_index]
+        floor_length = len(player.floor)
+        floor_points = self.calculate_negative_floor_points(floor_length)
+
+        fewest_lost: Union[int, None] = None
+        # Pattern lines that one draw can complete, as (tile, row)
+        completed_lines: List[Tuple[Tile, int]] = []
+
+        for tile in TILE_TYPES:
+            amounts = [factory[tile] for factory in (self.center_pile, *self.factories)]
+            if max(amounts) == 0:
+                continue
+
+            most_space = 0
+            for row_index, line in enumerate(player.pattern_lines):
+                if (
+                    (line.tile == tile or line.tile == EMPTY)
+                    and line.space > 0
+                    and not player.wall[row_index][TILE_POSITIONS[tile][row_index]]
+                ):
+                    most_space = max(most_space, line.space)
+
+                    if max(amounts) >= line.space:
+                        completed_lines.append((tile, row_index))
+
+            for index, amount in enumerate(amounts):
+                if amount == 0:
+                    continue
+
+                # Tiles that don't fit on the emptiest pattern line go to the floor
+                dropped = amount - min(most_space, amount)
+                # The first draw from the center also takes the starting marker
+                if index == 0 and self.center_pile[STARTING_MARKER] == 1:
+                    dropped += 1
+
+                lost = (
+                    self.calculate_negative_floor_points(floor_length + dropped)
+                    - floor_points
+                )
+                if fewest_lost is None or lost < fewest_lost:
+                    fewest_lost = lost
+
+        most_gained = 0
+
+        if len(completed_lines) > 0:
+            # Full pattern lines are on the wall once the round is over
+            new_wall = [[value for value in row] for row in player.wall]
+            for row_index, line in enumerate(player.pattern_lines):
+                if line.space == 0 and line.tile != EMPTY:
+                    new_wall[row_index][TILE_POSITIONS[line.tile][row_index]] = True
+
+            for tile, row_index in completed_lines:
+                column_index = TILE_POSITIONS[tile][row_index]
+                gained = self.calculate_potential_points(
+                    new_wall, tile, row_index
+                ) + self.calculate_placement_bonus_points(
+                    player, new_wall, tile, row_index
+                )
+
+                # Full lines below are scored after this one, so the new tile can join their column
+                # (to at most every row above, plus one for connecting both ways)
+                for lower_row, line in enumerate(player.pattern_lines):
+                    if (
+                        lower_row > row_index
+                        and line.space == 0
+                        and line.tile != EMPTY
+                        and TILE_POSITIONS[line.tile][lower_row] == column_index
+                    ):
+                        gained += row_index + 2
+
+                most_gained = max(most_gained, gained)
+
+        return -(fewest_lost or 0), most_gained
+
+    # Bonus points that only placing this tile completes (calculate_potential_bonus_points counts every bonus on the wall)
+    def calculate_placement_bonus_points(
+        self, player: Player, wall: List[List[bool]], tile: Tile, row_index: int
+    ) -> int:
+        column_index = TILE_POSITIONS[tile][row_index]
+        bonus_points = 0
+
+        if not player.bonuses.row[row_index] and all(
+            wall[row_index][column] or column == column_index
+            for column in range(WALL_SIZE)
+        ):
+            bonus_points += HORIZONTAL_LINE_BONUS
+
+        if not player.bonuses.col[column_index] and all(
+            wall[row][column_index] or row == row_index for row in range(WALL_SIZE)
+        ):
+            bonus_points += VERTICAL_LINE_BONUS
+
+        if not player.bonuses.diagonal[TILE_TYPES.index(tile)] and all(
+            wall[row][TILE_POSITIONS[tile][row]] or row == row_index
+            for row in range(WALL_SIZE)
+        ):
+            bonus_points += FIVE_OF_A_KIND_BONUS
+
+        return bonus_points
+
     def calculate_negative_floor_points(self, floor_length: int) -> int:
         # Floor points are stored in NEGATIVE_FLOOR_POINTS (sum the first n which are occupied)
         return sum(NEGATIVE_FLOOR_POINTS[:floor_length])
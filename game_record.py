@@ -0,0 +1,133 @@
+import json
+import os
+from constants import *
+from typing import Iterator, List, Tuple, TypedDict, Union
+from game import Game, Move
+
+
+# The result is None for a game that didn't finish, error describes why if it crashed
+# Everything after the moves is one entry per move, in the same order (search stats are None for human moves)
+class GameRecord(TypedDict):
+    seed: int
+    first_player: int
+    players: List[str]
+    result: Union[int, None]
+    error: Union[str, None]
+    moves: List[int]
+    scores: List[Union[float, None]]
+    nodes: List[Union[int, None]]
+    depths: List[Union[int, None]]
+    times: List[float]
+
+
+# A move is identified by where the tiles come from, which tile and where they go
+# The rest of Move follows from the position, so decoding looks the move up in Game.all_moves
+def encode_move(move: Move) -> int:
+    source = 0 if move.is_center_draw else move.factory_index + 1
+    line = move.pattern_line + 1
+
+    return source * 64 + move.drawing * 8 + line
+
+
+def decode_move(game: Game, turn: int, code: int) -> Move:
+    for move in game.all_moves(turn):
+        if encode_move(move) == code:
+            return move
+
+    raise Exception(f"Move {code} is not possible in this position")
+
+
+def new_record(seed: int, first_player: int, players: List[str]) -> GameRecord:
+    return {
+        "seed": seed,
+        "first_player": first_player,
+        "players": players,
+        "result": None,
+        "error": None,
+        "moves": [],
+        "scores": [],
+        "nodes": [],
+        "depths": [],
+        "times": [],
+    }
+
+
+def add_move(
+    record: GameRecord,
+    move: Move,
+    score: Union[float, None],
+    nodes: Union[int, None],
+    depth: Union[int, None],
+    move_time: float,
+) -> None:
+    record["moves"].append(encode_move(move))
+    record["scores"].append(score)
+    record["nodes"].append(nodes)
+    record["depths"].append(depth)
+    record["times"].append(round(move_time, 4))
+
+
+# Pool workers append their own records, so every record is written with a single write call
+# to the end of the file, where records from several processes never interleave
+def append_record(record: GameRecord, path: str = GAME_RECORD_FILE) -> None:
+    line = (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+
+    file = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(file, line)
+        os.fsync(file)
+    finally:
+        os.close(file)
+
+
+def read_records(path: str = GAME_RECORD_FILE) -> List[GameRecord]:
+    if not os.path.exists(path):
+        return []
+
+    records: List[GameRecord] = []
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            # The last line may be cut off by a crash
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                pass
+
+    return records
+
+
+# Yields (game, turn, ply) before every move and once after the last one, without searching
+# Rounds are scored and dealt in the same places as in compare.play_game (except after the game is over)
+# The yielded game is changed by the next step, so copy it to keep it
+def replay(record: GameRecord) -> Iterator[Tuple[Game, int, int]]:
+    game = Game(seed=record["seed"])
+    turn = record["first_player"]
+
+    for ply, code in enumerate(record["moves"]):
+        if game.is_round_over():
+            game.calculate_points_and_modify()
+            turn = game.new_round()
+
+        yield game, turn, ply
+
+        game.make_move(turn, decode_move(game, turn, code))
+        turn = (turn + 1) % 2
+
+    if game.is_round_over():
+        game.calculate_points_and_modify()
+        if not game.is_game_over():
+            turn = game.new_round()
+
+    yield game, turn, len(record["moves"])
+
+
+# The position before move number ply (or after the last move if ply is the number of moves)
+def position_at(record: GameRecord, ply: int) -> Tuple[Game, int]:
+    if not 0 <= ply <= len(record["moves"]):
+        raise Exception(f"The game only has {len(record['moves'])} moves")
+
+    for game, turn, current_ply in replay(record):
+        if current_ply == ply:
+            return game.copy(), turn
+
+    raise Exception("Something went wrong")
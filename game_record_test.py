@@ -0,0 +1,81 @@
+import random
+import pytest
+from compare import unpack
+from evaluation import EvaluationVersion
+from evaluation_versions import v2
+from game import Game
+from game_record import add_move, new_record, position_at, read_records, replay
+
+
+# Plays random moves while recording them, and returns the position before every move
+def record_random_game(seed: int):
+    record = new_record(seed, seed % 2, ["random", "random"])
+    game = Game(seed=seed)
+    turn = seed % 2
+    move_random = random.Random(seed)
+    positions = []
+
+    while not game.is_game_over():
+        if game.is_round_over():
+            game.calculate_points_and_modify()
+            turn = game.new_round()
+        else:
+            # Anything else using the global random generator must not change the deals
+            random.random()
+
+            positions.append((game.to_bytes(turn), turn))
+            move = move_random.choice(game.all_moves(turn))
+            add_move(record, move, 0, 0, None, 0)
+
+            game.make_move(turn, move)
+            turn = (turn + 1) % 2
+
+    record["result"] = game.players[0].points - game.players[1].points
+
+    return record, positions
+
+
+def test_replay():
+    for seed in range(5):
+        record, positions = record_random_game(seed)
+        replayed = list((game.to_bytes(turn), turn) for game, turn, _ in replay(record))
+
+        assert replayed[:-1] == positions
+
+        game, _ = position_at(record, len(record["moves"]))
+        assert game.players[0].points - game.players[1].points == record["result"]
+
+
+class EngineCrash(Exception):
+    pass
+
+
+# A game that crashes is still saved, with the moves played before the crash
+def test_crashed_game_is_recorded(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    evaluations = 0
+
+    def crashing_evaluation(game, player, points_result):
+        nonlocal evaluations
+        evaluations += 1
+        if evaluations > 5000:
+            raise EngineCrash("out of evaluations")
+
+        return v2.player_evaluation(game, player, points_result)
+
+    player_eval: EvaluationVersion = {
+        "player_evaluation": crashing_evaluation,
+        "move_potential": v2.move_potential,
+    }
+
+    with pytest.raises(EngineCrash):
+        unpack([7, 1, True, ["v2", "v2"], (None, None), 0.01, player_eval, player_eval])
+
+    [record] = read_records()
+    assert record["result"] is None
+    assert "out of evaluations" in record["error"]
+    assert len(record["moves"]) > 0
+    assert len(record["depths"]) == len(record["moves"])
+
+    # The position where the engine crashed can be loaded to look into it
+    position_at(record, len(record["moves"]))
@@ -0,0 +1,118 @@
+from constants import *
+import random
+import pytest
+from game import Game, SNAPSHOT
+from benchmark_corpus import load_corpus
+
+
+CORPUS = load_corpus()
+
+
+def assert_same_position(restored: Game, game: Game):
+    assert restored.to_json(0) == game.to_json(0)
+    assert restored.is_first_round == game.is_first_round
+    for restored_player, player in zip(restored.players, game.players):
+        assert restored_player.bonuses == player.bonuses
+
+
+@pytest.mark.parametrize("name", list(CORPUS))
+def test_bytes_round_trip(name: str):
+    game, turn = CORPUS[name]
+    data = game.to_bytes(turn)
+
+    restored, restored_turn = Game.from_bytes(data)
+
+    assert len(data) == SNAPSHOT.size
+    assert restored_turn == turn
+    assert restored.to_json(restored_turn) == game.to_json(turn)
+    assert restored.to_bytes(restored_turn) == data
+
+
+# Every position of a few random games, including finished rounds with bonuses
+def test_bytes_round_trip_games():
+    for seed in range(5):
+        game = Game(seed=seed)
+        move_random = random.Random(seed)
+        turn = 0
+
+        while not game.is_game_over():
+            if game.is_round_over():
+                game.calculate_points_and_modify()
+                turn = game.new_round()
+            else:
+                game.make_move(turn, move_random.choice(game.all_moves(turn)))
+                turn = (turn + 1) % 2
+
+            restored, restored_turn = Game.from_bytes(game.to_bytes(turn))
+
+            assert restored_turn == turn
+            assert_same_position(restored, game)
+            assert restored.all_moves(turn) == game.all_moves(turn)
+
+
+def test_bytes_version():
+    game, turn = CORPUS["mid_0"]
+    data = bytearray(game.to_bytes(turn))
+    data[0] = SNAPSHOT_VERSION + 1
+
+    with pytest.raises(Exception, match="Unsupported snapshot version"):
+        Game.from_bytes(bytes(data))
+
+
+# Points of the round so far, as the evaluations count them
+def round_points(game: Game, player_index: int) -> int:
+    result = game.calculate_points()[player_index]
+    return (
+        sum(change.points for change in result.point_changes if change.completed)
+        - result.negative_floor_points
+        + result.bonus_points
+    )
+
+
+# Futility pruning relies on no move gaining more than the upper bound, and the best move losing no more than the lower one
+def test_move_point_bounds():
+    for seed in range(5):
+        game = Game(seed=seed)
+        move_random = random.Random(seed)
+        turn = 0
+
+        while not game.is_game_over():
+            if game.is_round_over():
+                game.calculate_points_and_modify()
+                turn = game.new_round()
+                continue
+
+            lowest, highest = game.move_point_bounds(turn)
+            points = round_points(game, turn)
+
+            changes = []
+            for move in game.all_moves(turn):
+                game.make_move(turn, move)
+                changes.append(round_points(game, turn) - points)
+                game.undo_move(turn, move)
+
+            assert lowest <= max(changes) <= highest
+
+            game.make_move(turn, move_random.choice(game.all_moves(turn)))
+            turn = (turn + 1) % 2
+
+
+# train.py reads the v4 basic points from the first feature, including the first round bonus
+def test_features_basic_points():
+    game = Game(seed=0)
+    game.is_first_round = True
+    move = next(
+        move
+        for move in game.all_moves(0)
+        if move.pattern_line >= 0
+        and TILE_POSITIONS[move.drawing][move.pattern_line] in [1, 2, 3]
+    )
+    game.make_move(0, move)
+
+    points_results = game.calculate_points()
+    features = game.features(points_results)
+
+    assert features[0] == game.basic_points(points_results[0]) - game.basic_points(
+        points_results[1]
+    )
+    assert features[0] == round_points(game, 0) - round_points(game, 1) + 0.5
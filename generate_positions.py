@@ -1,20 +1,27 @@
-import multiprocessing
+import argparse
+from constants import *
 from typing import List, Tuple
 from evaluation import load_player_eval
 from game import Game
 from search import get_best_move
-import random
+from workers import create_pool
+from checkpoint import ProgressLog
+from dataset import DataPoint, ShardWriter
+from position_store import PositionStore
+from profiling import Profiler
 from tqdm import tqdm
 
 
-def play(_: None):
-    data_points: List[Tuple[str, float]] = []
+def play(seed: int) -> Tuple[int, List[DataPoint], List[Tuple[bytes, float]]]:
+    data_points: List[DataPoint] = []
+    # The same positions as snapshots, so they can be loaded back into a Game
+    positions: List[Tuple[bytes, float]] = []
 
     v3_eval = load_player_eval("v3")
     v4_eval = load_player_eval("v4")
 
-    turn = random.randint(0, 1)
-    game = Game()
+    turn = seed % 2
+    game = Game(seed=seed)
 
     while not game.is_game_over():
         if game.is_round_over():
@@ -39,50 +46,84 @@ def play(_: None):
             game.make_move(turn, result.move)
 
             if turn == 0:
-                data_point = (game.serialize(game.calculate_points()), result.score)
+                data_point = (game.features(game.calculate_points()), result.score)
                 data_points.append(data_point)
+                positions.append((game.to_bytes((turn + 1) % 2), result.score))
 
                 # print(data_point[1])
 
             turn = (turn + 1) % 2
 
-    return data_points
+    return seed, data_points, positions
 
 
-def write_data_points(data_points: List[Tuple[str, float]]):
-    file = open("data_points.txt", "w")
-    file.writelines(
-        [f"{data_point[0]} {data_point[1]}\n" for data_point in data_points]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Add positions scored by the search to the dataset"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help=f"Profile every worker and save the merged results in {PROFILE_DIRECTORY}/",
     )
-    file.close()
+    args = parser.parse_args()
 
+    profiler = Profiler() if args.profile else None
 
-if __name__ == "__main__":
     num_games = 1000
 
-    data_points: List[Tuple[str, float]] = []
+    # New data points are added to any existing dataset
+    writer = ShardWriter()
+    store = PositionStore()
+
+    # Every game's data points are appended as soon as it finishes, then the game is logged as done
+    progress = ProgressLog(
+        POSITIONS_PROGRESS_FILE,
+        {"games": num_games},
+        metadata={"dataset_rows": writer.rows, "stored_positions": len(store)},
+    )
+    saved_data_points = sum(entry["data_points"] for entry in progress.entries.values())
+
+    # Remove data points from a game that finished after the last progress entry
+    writer.truncate(progress.metadata["dataset_rows"] + saved_data_points)
+    store.truncate(progress.metadata["stored_positions"] + saved_data_points)
+
+    remaining = [
+        progress.seed(index)
+        for index in range(num_games)
+        if not progress.is_done(progress.seed(index))
+    ]
 
     try:
-        with multiprocessing.Pool() as pool:
+        with create_pool(
+            preload=["evaluation_versions.v3", "evaluation_versions.v4"]
+        ) as pool:
             progress_bar = tqdm(
-                pool.imap(
-                    play,
-                    [None] * num_games,
+                pool.imap_unordered(
+                    play if profiler is None else profiler.wrap(play), remaining
                 ),
                 total=num_games,
-                postfix={"Data points": len(data_points)},
+                initial=num_games - len(remaining),
+                postfix={"Data points": saved_data_points},
             )
 
-            for result in progress_bar:
-                data_points.extend(result)
+            for seed, data_points, positions in progress_bar:
+                writer.write(data_points)
+                store.append_snapshots(positions)
+                progress.append(seed, data_points=len(data_points))
+                saved_data_points += len(data_points)
 
-                progress_bar.set_postfix({"Data points": len(data_points)})
+                progress_bar.set_postfix({"Data points": saved_data_points})
 
-        print(f"SAVING {len(data_points)} DATA POINTS", data_points)
-        write_data_points(data_points)
+        writer.close()
+        print(f"SAVED {saved_data_points} DATA POINTS")
+        progress.remove()
 
-    except Exception as error:
-        print(error)
+    except KeyboardInterrupt:
+        writer.close(finish=False)
+        progress.close()
+        print(f"SAVED {saved_data_points} DATA POINTS, run again to resume")
 
-        print(f"SAVING {len(data_points)} DATA POINTS")
-        write_data_points(data_points)
+    # Workers save their profiles after every game, so an interrupted run is still reported
+    if profiler is not None:
+        profiler.report()
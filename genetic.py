@@ -1,76 +1,150 @@
 from constants import *
-from typing import List
+from typing import Any, Dict, List, Union
+import argparse
+import os
+import pickle
 import random
-from multiprocessing import Manager
-from evaluation import load_player_eval
+from evaluation import EvaluationVersion, load_player_eval
 from compare import play_game
+from scheduler import GameScheduler
+from workers import create_pool, limit_threads, worker_count
+from evaluation_versions.v4 import base_model
 from pygad import GA
 import pygad.torchga as torchga
-import torch.nn as nn
 from torch import save
 
 
-def fitness_func(ga_instance: GA, solution: List[float], sol_index: int):
-    old_eval = load_player_eval("v4")
-    new_eval = load_player_eval("v4", nn_weights=solution)
-
-    fitness = 0
-    for _ in range(10):
-        seed = random.randint(0, 100000)
-        result1 = play_game(
-            5,
-            new_eval,
-            old_eval,
-            first_player=0,
-            seed=seed,
-            depth_limit=1,
-        )
-        result2 = play_game(
-            5,
-            new_eval,
-            old_eval,
-            first_player=1,
-            seed=seed,
-            depth_limit=1,
-        )
+# Every solution in a generation plays the same seeds (common random numbers)
+FITNESS_SEED_PAIRS = 10
+# After this many seed pairs, solutions in the bottom part of the race stop early
+RACE_CHECKPOINTS = [2, 4, 6]
+RACE_KEEP_FRACTION = 0.5
+# Nobody is stopped until enough other solutions have reached the same checkpoint
+RACE_MIN_RESULTS = 10
+
+NUM_GENERATIONS = 50
+GA_CHECKPOINT_FILE = "ga_checkpoint.pkl"
+# The best solution so far is saved as a model every few generations
+BEST_MODEL_FILE = "ga_best_model.pt"
+EXPORT_INTERVAL = 5
+
+# Set in __main__, plays the games of every solution in a shared pool
+scheduler: Union[GameScheduler, None] = None
+loaded_evals: Dict[str, EvaluationVersion] = {}
 
-        fitness += result1 + result2
 
-    print(f"# {sol_index}: {fitness}")
+def generation_seeds(ga_instance: Any) -> List[int]:
+    generator = random.Random(
+        f"{ga_instance.run_seed}-{ga_instance.generations_completed}"
+    )
+    return [generator.randint(0, 100000) for _ in range(FITNESS_SEED_PAIRS)]
+
 
-    if fitness > 150:
-        state_dict = torchga.model_weights_as_dict(base_model(), solution)
-        save(state_dict, "nn_evaluation.pt")
-        print(f"New best model with fitness {fitness}")
+# Runs in the pool workers, the old evaluation is only loaded once per worker
+def play_fitness_game(solution: List[float], seed: int, first_player: int) -> int:
+    if "v4" not in loaded_evals:
+        loaded_evals["v4"] = load_player_eval("v4")
+
+    return play_game(
+        5,
+        load_player_eval("v4", nn_weights=solution),
+        loaded_evals["v4"],
+        first_player=first_player,
+        seed=seed,
+        depth_limit=1,
+    )
 
-    return fitness
+
+# Called by pygad with the whole population at once (fitness_batch_size)
+def fitness_func(
+    ga_instance: GA, solutions: List[List[float]], sol_indices: Any
+) -> List[float]:
+    if scheduler is None:
+        raise Exception("The game scheduler has not been started")
+
+    fitnesses = scheduler.run(list(solutions), generation_seeds(ga_instance))
+
+    for index, (solution_index, fitness) in enumerate(zip(sol_indices, fitnesses)):
+        print(f"# {solution_index}: {fitness}")
+
+        if fitness > 150:
+            state_dict = torchga.model_weights_as_dict(base_model(), solutions[index])
+            save(state_dict, "nn_evaluation.pt")
+            print(f"New best model with fitness {fitness}")
+
+    return fitnesses
 
 
 def on_generation(ga_instance: GA):
     print(f"Finished generation #{ga_instance.generations_completed}")
 
+    save_checkpoint(ga_instance)
 
-def base_model():
-    return nn.Sequential(
-        nn.Linear(18, 64),
-        nn.Sigmoid(),
-        nn.Linear(64, 64),
-        nn.ReLU(),
-        nn.Linear(64, 1),
-        nn.ReLU(),
-    )
+    if ga_instance.generations_completed % EXPORT_INTERVAL == 0:
+        solution, fitness, _ = ga_instance.best_solution(
+            pop_fitness=ga_instance.last_generation_fitness
+        )
+        save(torchga.model_weights_as_dict(base_model(), solution), BEST_MODEL_FILE)
+        print(f"Exported best model with fitness {fitness}")
+
+
+# Everything needed to continue the run, the GA object itself can't be pickled while it references the pool
+def save_checkpoint(ga_instance: GA) -> None:
+    checkpoint = {
+        "generations_completed": ga_instance.generations_completed,
+        "population": ga_instance.population,
+        "best_solutions_fitness": ga_instance.best_solutions_fitness,
+        "run_seed": ga_instance.run_seed,
+        "numpy_random_state": ga_instance.numpy_random_generator.get_state(),
+        "python_random_state": ga_instance.python_random_generator.getstate(),
+        "random_state": random.getstate(),
+    }
+
+    # Written to a temporary file first so an interruption never leaves a broken checkpoint
+    with open(GA_CHECKPOINT_FILE + ".tmp", "wb") as file:
+        pickle.dump(checkpoint, file)
+    os.replace(GA_CHECKPOINT_FILE + ".tmp", GA_CHECKPOINT_FILE)
+
+
+def load_checkpoint(ga_instance: GA, checkpoint: Dict[str, Any]) -> None:
+    # Pygad continues counting generations from generations_completed
+    ga_instance.generations_completed = checkpoint["generations_completed"]
+    ga_instance.best_solutions_fitness = checkpoint["best_solutions_fitness"]
+    ga_instance.run_seed = checkpoint["run_seed"]
+    ga_instance.numpy_random_generator.set_state(checkpoint["numpy_random_state"])
+    ga_instance.python_random_generator.setstate(checkpoint["python_random_state"])
+    random.setstate(checkpoint["random_state"])
 
 
 if __name__ == "__main__":
-    model = base_model()
+    parser = argparse.ArgumentParser(description="Evolve the v4 network weights")
+    parser.add_argument(
+        "--resume", action="store_true", help=f"Continue from {GA_CHECKPOINT_FILE}"
+    )
+    args = parser.parse_args()
+
+    limit_threads()
 
-    torch_ga = torchga.TorchGA(model=model, num_solutions=200)
-    torch_ga.create_population()
+    if args.resume:
+        with open(GA_CHECKPOINT_FILE, "rb") as file:
+            checkpoint = pickle.load(file)
+
+        initial_population = checkpoint["population"]
+        num_generations = NUM_GENERATIONS - checkpoint["generations_completed"]
+        print(f"Resuming after generation #{checkpoint['generations_completed']}")
+    else:
+        model = base_model()
+
+        torch_ga = torchga.TorchGA(model=model, num_solutions=200)
+        torch_ga.create_population()
+
+        initial_population = torch_ga.population_weights
+        num_generations = NUM_GENERATIONS
 
     ga = GA(
         fitness_func=fitness_func,
-        initial_population=torch_ga.population_weights,
-        num_generations=50,
+        initial_population=initial_population,
+        num_generations=num_generations,
         num_parents_mating=20,
         parent_selection_type="rws",
         crossover_type="uniform",
@@ -79,7 +153,24 @@ if __name__ == "__main__":
         init_range_high=1,
         init_range_low=-1,
         on_generation=on_generation,
-        parallel_processing=["process", 8],
+        fitness_batch_size=200,
     )
-    ga.run()
+    ga.run_seed = random.randint(0, 2**31 - 1)
+
+    # The population is evaluated again when the run starts, using the same seeds as before the interruption
+    if args.resume:
+        load_checkpoint(ga, checkpoint)
+
+    # Games (not solutions) are the unit of work, so every core stays busy until the generation ends
+    with create_pool(preload=["evaluation_versions.v4"]) as pool:
+        scheduler = GameScheduler(
+            pool,
+            play_fitness_game,
+            in_flight=2 * worker_count(),
+            race_checkpoints=RACE_CHECKPOINTS,
+            race_keep_fraction=RACE_KEEP_FRACTION,
+            race_min_results=RACE_MIN_RESULTS,
+        )
+        ga.run()
+
     ga.plot_fitness()
@@ -0,0 +1,118 @@
+import pickle
+import random
+import numpy as np
+from pygad import GA
+import genetic
+from genetic import (
+    GA_CHECKPOINT_FILE,
+    generation_seeds,
+    load_checkpoint,
+    save_checkpoint,
+)
+
+
+def create_ga() -> GA:
+    return GA(
+        fitness_func=lambda ga_instance, solution, index: 0,
+        initial_population=np.zeros((4, 3)),
+        num_generations=1,
+        num_parents_mating=2,
+        suppress_warnings=True,
+    )
+
+
+def test_checkpoint_round_trip(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    ga = create_ga()
+    ga.run_seed = 1234
+    ga.generations_completed = 7
+    ga.best_solutions_fitness = [1.0, 2.5]
+    ga.population = np.arange(12.0).reshape(4, 3)
+    save_checkpoint(ga)
+
+    with open(GA_CHECKPOINT_FILE, "rb") as file:
+        checkpoint = pickle.load(file)
+    assert np.array_equal(checkpoint["population"], ga.population)
+
+    # The resumed run continues with the same generation and random numbers
+    expected_draws = (
+        ga.numpy_random_generator.random(),
+        ga.python_random_generator.random(),
+        random.random(),
+    )
+
+    resumed = create_ga()
+    load_checkpoint(resumed, checkpoint)
+
+    assert resumed.generations_completed == 7
+    assert resumed.best_solutions_fitness == [1.0, 2.5]
+    assert generation_seeds(resumed) == generation_seeds(ga)
+    assert (
+        resumed.numpy_random_generator.random(),
+        resumed.python_random_generator.random(),
+        random.random(),
+    ) == expected_draws
+
+
+# A run that is interrupted after a generation and resumed ends with the same population as one that wasn't
+def test_resume_continues_run(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    def create_run(initial_population: np.ndarray, num_generations: int) -> GA:
+        ga = GA(
+            fitness_func=lambda ga_instance, solution, index: -float(
+                np.sum(solution**2)
+            ),
+            initial_population=initial_population,
+            num_generations=num_generations,
+            num_parents_mating=2,
+            parent_selection_type="rws",
+            crossover_type="uniform",
+            mutation_type="adaptive",
+            mutation_probability=[0.1, 0.05],
+            on_generation=save_checkpoint,
+            random_seed=5,
+            suppress_warnings=True,
+        )
+        ga.run_seed = 1234
+        return ga
+
+    initial_population = np.random.default_rng(0).uniform(-1, 1, (6, 3))
+    random.seed(0)
+    uninterrupted = create_run(initial_population, 3)
+    uninterrupted.run()
+
+    random.seed(0)
+    create_run(initial_population, 1).run()
+    with open(GA_CHECKPOINT_FILE, "rb") as file:
+        checkpoint = pickle.load(file)
+
+    # As genetic.py --resume does it
+    resumed = create_run(
+        checkpoint["population"], 3 - checkpoint["generations_completed"]
+    )
+    load_checkpoint(resumed, checkpoint)
+    resumed.run()
+
+    assert resumed.generations_completed == 3
+    assert np.array_equal(resumed.population, uninterrupted.population)
+    assert resumed.best_solutions_fitness == uninterrupted.best_solutions_fitness
+
+
+class FixedScheduler:
+    def run(self, solutions, seeds):
+        return [float(index) for index in range(len(solutions))]
+
+
+# pygad may evaluate part of the population, the output names solutions by their population index
+def test_fitness_func_reports_population_indices(monkeypatch, capsys):
+    monkeypatch.setattr(genetic, "scheduler", FixedScheduler())
+
+    ga = create_ga()
+    ga.run_seed = 0
+
+    fitness = genetic.fitness_func(ga, [[0.0], [0.0]], [2, 3])
+
+    assert fitness == [0.0, 1.0]
+    assert capsys.readouterr().out.splitlines() == ["# 2: 0.0", "# 3: 1.0"]
@@ -1,11 +1,23 @@
 from __future__ import annotations
 from collections import Counter
+import functools
 import math
 from constants import *
-from typing import NamedTuple, Tuple, Union, List, Literal, Dict
-from dataclasses import dataclass
-from game import Game, Move, PartialMove
+from typing import (
+    Any,
+    Callable,
+    Hashable,
+    NamedTuple,
+    Tuple,
+    Union,
+    List,
+    Literal,
+    Dict,
+)
+from dataclasses import dataclass, field
+from game import Factory, Game, Move, PartialMove
 from player import Player
+from search import Telemetry
 from utils import Vector
 import pygame
 from pygame import gfxdraw
@@ -20,12 +32,33 @@ class TileImage:
     normal: pygame.Surface
 
 
+# What each screen region showed when it was last drawn, so unchanged regions are not redrawn
+@dataclass
+class FrameState:
+    region_keys: Dict[str, Hashable] = field(default_factory=dict)
+    full_redraw: bool = True
+    cursor: Union[int, None] = None
+    # Position indexes of the last few game states, keyed by Game.to_bytes
+    position_indexes: Dict[bytes, PositionIndex] = field(default_factory=dict)
+
+
 class GraphicsInfo(NamedTuple):
     canvas: pygame.Surface
     clock: pygame.time.Clock
     floor_font: pygame.font.Font
     main_font: pygame.font.Font
     images: Dict[ImageFileName, TileImage]
+    frame: FrameState
+    # Everything that doesn't change during a game
+    background: pygame.Surface
+
+
+# A part of the screen, drawn by draw whenever key changes
+class Region(NamedTuple):
+    name: str
+    rect: pygame.Rect
+    key: Hashable
+    draw: Callable[[], None]
 
 
 def init() -> GraphicsInfo:
@@ -62,230 +95,184 @@ def init() -> GraphicsInfo:
 
         images[tile] = TileImage(faded=faded_image, normal=image)
 
-    return GraphicsInfo(canvas, clock, floor_font, main_font, images)
+    background = pygame.Surface((TOTAL_WIDTH, TOTAL_HEIGHT)).convert()
+    render_background(background, floor_font, images)
 
+    return GraphicsInfo(
+        canvas, clock, floor_font, main_font, images, FrameState(), background
+    )
 
-# Return the possible positions for a tile of a given type
-def get_player_rendering_positions(
-    player: Player,
-    tile: Union[Tile, Literal[6]],
-    type: Literal["wall", "pattern_line", "floor"],
-    line_index: int = 0,
-) -> List[Vector]:
-    positions: List[Vector] = []
 
-    w_transform = 1 + SECTION_SPACING
-    h_transform = PLAYER_HEIGHT if player.index == 1 else 0
+def row_y_position(row_index: int) -> int:
+    return SCORE_HEIGHT + (TILE_SIZE + TILE_SPACING) * row_index
 
-    if type == "pattern_line":
-        y_pos = SCORE_HEIGHT + (TILE_SIZE + TILE_SPACING) * line_index
-        line = player.pattern_lines[line_index]
 
-        for column_index in range(line_index, -1, -1):
-            x_pos = (TILE_SIZE + TILE_SPACING) * (WALL_SIZE - column_index - 1)
-            tile_type = (
-                line.tile if line_index - column_index + 1 - line.space > 0 else EMPTY
-            )
-            if tile == tile_type:
-                positions.append(Vector(w_transform + x_pos, h_transform + y_pos))
+def wall_x_position(column_index: int) -> int:
+    return (
+        (TILE_SIZE + TILE_SPACING) * (WALL_SIZE + column_index)
+        - TILE_SPACING
+        + 1
+        + SECTION_SPACING
+    )
 
-    elif type == "wall" and tile != STARTING_MARKER:
-        x = TILE_POSITIONS[tile][line_index]
 
-        x_pos = (
-            (TILE_SIZE + TILE_SPACING) * (WALL_SIZE + x)
-            - TILE_SPACING
-            + 1
-            + SECTION_SPACING
-        )
-        y_pos = SCORE_HEIGHT + (TILE_SIZE + TILE_SPACING) * line_index
+FLOOR_Y_POSITION = PLAYER_HEIGHT - TILE_SIZE - SECTION_SPACING
 
-        positions.append(Vector(w_transform + x_pos, h_transform + y_pos))
 
-    elif type == "floor":
-        for x in range(NUM_FLOOR_TILES):
-            x_pos = (TILE_SIZE + FLOOR_TILE_SPACING) * x
-            y_pos = PLAYER_HEIGHT - TILE_SIZE - SECTION_SPACING
-            tile_type = player.floor[x] if x < len(player.floor) else EMPTY
+def floor_x_position(index: int) -> int:
+    return (TILE_SIZE + FLOOR_TILE_SPACING) * index
 
-            if tile == tile_type:
-                positions.append(Vector(w_transform + x_pos, h_transform + y_pos))
 
-    return positions
+def render_tile_border(surface: pygame.Surface, x_pos: int, y_pos: int) -> None:
+    pygame.draw.rect(
+        surface,
+        COLOR_BROWN,
+        (x_pos - 1, y_pos - 1, TILE_SIZE + 2, TILE_SIZE + 2),
+        width=1,
+    )
 
 
-def render_player(
-    player: Player,
-    graphics_info: GraphicsInfo,
-    w_transform: int,
-    h_transform: int,
-    *,
-    wins: int = -1,
-    no_tiles_but_wall: bool = False,
-    highlight_lines: bool = False,
-    partial_move: Union[PartialMove, None] = None,
+# Draws the section borders, tile borders, faded wall tiles, floor numbers and factory circles
+def render_background(
+    surface: pygame.Surface,
+    floor_font: pygame.font.Font,
+    images: Dict[ImageFileName, TileImage],
 ) -> None:
-    def draw_tile_and_border(
-        x_pos: float,
-        y_pos: float,
-        tile: Union[ImageFileName, Literal[0]],
-        *,
-        faded: bool = True,
-        force_tiles: bool = False,
-    ) -> None:
-        pygame.draw.rect(
-            graphics_info.canvas,
-            COLOR_BROWN,
-            (
-                x_pos - 1,
-                y_pos - 1,
-                TILE_SIZE + 2,
-                TILE_SIZE + 2,
-            ),
-            width=1,
-        )
-        if tile != EMPTY and (not no_tiles_but_wall or force_tiles):
-            graphics_info.canvas.blit(
-                graphics_info.images[tile].faded
-                if faded
-                else graphics_info.images[tile].normal,
-                (x_pos, y_pos),
-            )
+    surface.fill(COLOR_WHITE)
 
-    # Floor and pattern line tiles
-    types: List[Union[Tile, Literal[6]]] = [
-        *TILE_TYPES,
-        STARTING_MARKER,
-    ]
-    for tile_type in types:
-        floor_positions = get_player_rendering_positions(player, tile_type, "floor")
+    # Line Borders
+    pygame.draw.aaline(
+        surface, COLOR_BLACK, (PLAYER_WIDTH, 0), (PLAYER_WIDTH, TOTAL_HEIGHT)
+    )
+    pygame.draw.aaline(
+        surface, COLOR_BLACK, (0, PLAYER_HEIGHT), (PLAYER_WIDTH, PLAYER_HEIGHT)
+    )
+
+    for player_index in [0, 1]:
+        w_transform = 1 + SECTION_SPACING
+        h_transform = PLAYER_HEIGHT if player_index == 1 else 0
 
-        pattern_line_positions: List[Vector] = []
-        for line_index in range(WALL_SIZE):
-            pattern_line_positions.extend(
-                get_player_rendering_positions(
-                    player, tile_type, "pattern_line", line_index
+        # Pattern Lines
+        for row_index in range(WALL_SIZE):
+            for column_index in range(row_index + 1):
+                x_pos = (TILE_SIZE + TILE_SPACING) * (WALL_SIZE - column_index - 1)
+                render_tile_border(
+                    surface,
+                    w_transform + x_pos,
+                    h_transform + row_y_position(row_index),
                 )
-            )
 
-        for position in floor_positions + pattern_line_positions:
-            draw_tile_and_border(position.x, position.y, tile_type, faded=False)
+        # Wall
+        for y in range(WALL_SIZE):
+            for x in range(WALL_SIZE):
+                x_pos = w_transform + wall_x_position(x)
+                y_pos = h_transform + row_y_position(y)
 
-    mouse = pygame.Vector2(pygame.mouse.get_pos())
-    player.hovered_pattern_line = None
+                render_tile_border(surface, x_pos, y_pos)
+                surface.blit(images[WALL_TILES[y][x]].faded, (x_pos, y_pos))
 
-    # Pattern Lines
-    for row_index in range(len(player.pattern_lines)):
-        y_pos = SCORE_HEIGHT + (TILE_SIZE + TILE_SPACING) * row_index
+        # Floor
+        for x in range(NUM_FLOOR_TILES):
+            x_pos = w_transform + floor_x_position(x)
+            y_pos = h_transform + FLOOR_Y_POSITION
 
-        for column_index in range(row_index + 1):
-            x_pos = (TILE_SIZE + TILE_SPACING) * (WALL_SIZE - column_index - 1)
+            render_tile_border(surface, x_pos, y_pos)
 
-            draw_tile_and_border(
-                w_transform + x_pos, h_transform + y_pos, EMPTY, faded=False
-            )
+            number = NEGATIVE_FLOOR_POINTS[x] if x < len(NEGATIVE_FLOOR_POINTS) else 3
 
-        if (
-            highlight_lines
-            and player.index == 0
-            and partial_move
-            and (
-                partial_move.drawing == player.pattern_lines[row_index].tile
-                or player.pattern_lines[row_index].tile == EMPTY
-            )
-            and player.pattern_lines[row_index].space > 0
-            and player.wall[row_index][TILE_POSITIONS[partial_move.drawing][row_index]]
-            == EMPTY
-        ):
-            rect_x = (
-                w_transform
-                + (TILE_SIZE + TILE_SPACING) * (WALL_SIZE - row_index - 1)
-                - 2
+            text = floor_font.render(f"-{number}", True, BLACK)
+            text_rect = text.get_rect(
+                center=(
+                    x_pos + TILE_SIZE / 2,
+                    y_pos - FLOOR_NUMBER_HEIGHT / 2,
+                )
             )
-            rect_y = h_transform + y_pos - 2
-            rect_w = (TILE_SIZE + TILE_SPACING) * (row_index + 1) - 4
-            rect_h = TILE_SIZE + TILE_SPACING - 4
+            surface.blit(text, text_rect)
 
-            if (
-                rect_x <= mouse.x <= rect_x + rect_w
-                and rect_y <= mouse.y <= rect_y + rect_h
-            ):
-                player.hovered_pattern_line = row_index
-                pygame.mouse.set_cursor(pygame.SYSTEM_CURSOR_HAND)
+    for index in range(FACTORY_COUNT):
+        position = game_factory_position(index)
+        gfxdraw.aacircle(
+            surface, int(position.x), int(position.y), FACTORY_RADIUS, COLOR_BLACK
+        )
 
-            pygame.draw.rect(
-                graphics_info.canvas,
-                COLOR_RED,
-                (
-                    rect_x,
-                    rect_y,
-                    rect_w,
-                    rect_h,
-                ),
-                width=2,
-            )
 
-    # Wall
-    for y in range(WALL_SIZE):
-        for x in range(WALL_SIZE):
-            x_pos = (
-                (TILE_SIZE + TILE_SPACING) * (WALL_SIZE + x)
-                - TILE_SPACING
-                + 1
-                + SECTION_SPACING
-            )
-            y_pos = SCORE_HEIGHT + (TILE_SIZE + TILE_SPACING) * y
-
-            draw_tile_and_border(
-                w_transform + x_pos,
-                h_transform + y_pos,
-                WALL_TILES[y][x],
-                faded=not player.wall[y][x],
-                force_tiles=True,
-            )
+# The next render_game redraws the whole screen (eg. after something else drew on the canvas)
+def invalidate(graphics_info: GraphicsInfo) -> None:
+    graphics_info.frame.full_redraw = True
 
-    # Floor
-    for x in range(NUM_FLOOR_TILES):
-        x_pos = (TILE_SIZE + FLOOR_TILE_SPACING) * x
-        y_pos = PLAYER_HEIGHT - TILE_SIZE - SECTION_SPACING
 
-        draw_tile_and_border(
-            w_transform + x_pos, h_transform + y_pos, EMPTY, faded=False
-        )
+def set_cursor(graphics_info: GraphicsInfo, cursor: int) -> None:
+    if graphics_info.frame.cursor == cursor:
+        return
 
-        number = NEGATIVE_FLOOR_POINTS[x] if x < len(NEGATIVE_FLOOR_POINTS) else 3
+    graphics_info.frame.cursor = cursor
+    try:
+        pygame.mouse.set_cursor(cursor)
+    except pygame.error:
+        # There are no system cursors without a display (eg. the dummy video driver)
+        pass
 
-        text = graphics_info.floor_font.render(f"-{number}", True, BLACK)
-        text_rect = text.get_rect(
-            center=(
-                w_transform + x_pos + TILE_SIZE / 2,
-                h_transform + y_pos - FLOOR_NUMBER_HEIGHT / 2,
+
+def render_player(
+    player: Player,
+    graphics_info: GraphicsInfo,
+    w_transform: int,
+    h_transform: int,
+    *,
+    wins: int = -1,
+    no_tiles_but_wall: bool = False,
+    highlight_lines: bool = False,
+    partial_move: Union[PartialMove, None] = None,
+    index: PositionIndex,
+) -> None:
+    highlighted_lines = get_highlighted_lines(player, highlight_lines, partial_move)
+
+    # Borders, the faded wall and the floor numbers are part of the background
+    # Floor and pattern line tiles
+    if not no_tiles_but_wall:
+        types: List[Union[Tile, Literal[6]]] = [
+            *TILE_TYPES,
+            STARTING_MARKER,
+        ]
+        sources: List[TileSource] = [
+            ("floor", player.index, 0),
+            *(("pattern_line", player.index, line) for line in range(WALL_SIZE)),
+        ]
+        for tile_type in types:
+            # The borders overlap the tiles' edges, so they are drawn again on top
+            for source in sources:
+                for position in index.get(source, tile_type):
+                    render_tile(graphics_info, tile_type, position)
+                    render_tile_border(graphics_info.canvas, position.x, position.y)
+
+    # Lines (and the floor) that the chosen tiles can be placed on
+    for rect in highlighted_lines.values():
+        pygame.draw.rect(graphics_info.canvas, COLOR_RED, rect, width=2)
+
+    # The floor's borders are drawn over its highlight
+    if -1 in highlighted_lines:
+        for x in range(NUM_FLOOR_TILES):
+            render_tile_border(
+                graphics_info.canvas,
+                w_transform + floor_x_position(x),
+                h_transform + FLOOR_Y_POSITION,
             )
-        )
-        graphics_info.canvas.blit(text, text_rect)
 
-    if highlight_lines and player.index == 0:
-        rect_x = w_transform - 2
-        rect_y = h_transform + PLAYER_HEIGHT - TILE_SIZE - SECTION_SPACING - 2
-        rect_w = (TILE_SIZE + FLOOR_TILE_SPACING) * NUM_FLOOR_TILES - 4
-        rect_h = TILE_SIZE + 3
+    # Wall, the edges of the tile images are partly transparent so the faded tile is cleared first
+    for y in range(WALL_SIZE):
+        for x in range(WALL_SIZE):
+            if player.wall[y][x]:
+                position = Vector(
+                    w_transform + wall_x_position(x), h_transform + row_y_position(y)
+                )
 
-        if (
-            rect_x <= mouse.x <= rect_x + rect_w
-            and rect_y <= mouse.y <= rect_y + rect_h
-        ):
-            player.hovered_pattern_line = -1
-            pygame.mouse.set_cursor(pygame.SYSTEM_CURSOR_HAND)
-
-        pygame.draw.rect(
-            graphics_info.canvas,
-            COLOR_RED,
-            (rect_x, rect_y, rect_w, rect_h),
-            width=2,
-        )
+                graphics_info.canvas.fill(
+                    COLOR_WHITE, (position.x, position.y, TILE_SIZE, TILE_SIZE)
+                )
+                render_tile(graphics_info, WALL_TILES[y][x], position)
 
     # Score
-    text = graphics_info.main_font.render(f"Score: {player.points}", True, BLACK)
+    text = render_text(graphics_info.main_font, f"Score: {player.points}", BLACK)
     if wins == -1:
         text_rect = text.get_rect(
             center=(
@@ -304,7 +291,7 @@ def render_player(
 
     # Wins
     if wins != -1:
-        text = graphics_info.main_font.render(f"Wins: {wins}", True, BLACK)
+        text = render_text(graphics_info.main_font, f"Wins: {wins}", BLACK)
         text_rect = text.get_rect(
             midleft=(
                 SECTION_SPACING,
@@ -314,6 +301,62 @@ def render_player(
         graphics_info.canvas.blit(text, text_rect)
 
 
+# Rectangles around the pattern lines the partial move can be placed on, the floor (-1) is always included
+def get_highlighted_lines(
+    player: Player,
+    highlight_lines: bool,
+    partial_move: Union[PartialMove, None],
+) -> Dict[int, pygame.Rect]:
+    rects: Dict[int, pygame.Rect] = {}
+
+    if not highlight_lines or player.index != 0:
+        return rects
+
+    for row_index, line in enumerate(player.pattern_lines):
+        if (
+            partial_move
+            and (partial_move.drawing == line.tile or line.tile == EMPTY)
+            and line.space > 0
+            and player.wall[row_index][TILE_POSITIONS[partial_move.drawing][row_index]]
+            == EMPTY
+        ):
+            rects[row_index] = line_highlight_rect(row_index)
+
+    rects[-1] = line_highlight_rect(-1)
+
+    return rects
+
+
+# The rectangle drawn around a pattern line (or the floor, -1) of the bottom board
+def line_highlight_rect(line_index: int) -> pygame.Rect:
+    w_transform = 1 + SECTION_SPACING
+
+    if line_index == -1:
+        return pygame.Rect(
+            w_transform - 2,
+            PLAYER_HEIGHT - TILE_SIZE - SECTION_SPACING - 2,
+            (TILE_SIZE + FLOOR_TILE_SPACING) * NUM_FLOOR_TILES - 4,
+            TILE_SIZE + 3,
+        )
+
+    y_pos = SCORE_HEIGHT + (TILE_SIZE + TILE_SPACING) * line_index
+    return pygame.Rect(
+        w_transform + (TILE_SIZE + TILE_SPACING) * (WALL_SIZE - line_index - 1) - 2,
+        y_pos - 2,
+        (TILE_SIZE + TILE_SPACING) * (line_index + 1) - 4,
+        TILE_SIZE + TILE_SPACING - 4,
+    )
+
+
+def update_hovered_pattern_line(
+    player: Player, highlighted_lines: Dict[int, pygame.Rect]
+) -> None:
+    line_index = PATTERN_LINE_HIT_GRID.find(pygame.mouse.get_pos())
+    player.hovered_pattern_line = (
+        line_index if line_index in highlighted_lines else None
+    )
+
+
 # Rendering location of factories
 def game_factory_position(index: int) -> Vector:
     radius = CENTER_SIZE // 2 - FACTORY_RADIUS - CENTER_BORDER
@@ -325,6 +368,43 @@ def game_factory_position(index: int) -> Vector:
     return Vector(PLAYER_WIDTH + CENTER_SIZE // 2 + x_pos, CENTER_SIZE // 2 + y_pos)
 
 
+# Screen regions of the center section
+FACTORY_RECTS = [
+    pygame.Rect(
+        position.x - FACTORY_RADIUS - 1,
+        position.y - FACTORY_RADIUS - 1,
+        2 * FACTORY_RADIUS + 3,
+        2 * FACTORY_RADIUS + 3,
+    )
+    for position in map(game_factory_position, range(FACTORY_COUNT))
+]
+CENTER_PILE_RECT = pygame.Rect(
+    PLAYER_WIDTH
+    + CENTER_SIZE // 2
+    - CENTER_GRID_SIZE * TILE_SIZE // 2
+    - (CENTER_GRID_SIZE - 1) * TILE_SPACING // 2,
+    CENTER_SIZE // 2
+    - CENTER_GRID_SIZE * TILE_SIZE // 2
+    - (CENTER_GRID_SIZE - 1) * TILE_SPACING // 2,
+    CENTER_GRID_SIZE * (TILE_SIZE + TILE_SPACING),
+    CENTER_GRID_SIZE * (TILE_SIZE + TILE_SPACING),
+)
+TIES_RECT = pygame.Rect(
+    PLAYER_WIDTH + CENTER_SIZE // 4,
+    CENTER_SIZE - SCORE_HEIGHT,
+    CENTER_SIZE // 2,
+    SCORE_HEIGHT,
+)
+# Top left corner of the center section, next to the first factory
+ANALYSIS_LINES = 6
+ANALYSIS_RECT = pygame.Rect(
+    PLAYER_WIDTH + SECTION_SPACING,
+    SECTION_SPACING,
+    CENTER_SIZE // 3,
+    ANALYSIS_LINES * (FLOOR_FONT_SIZE + ANALYSIS_LINE_SPACING),
+)
+
+
 # Used for piece animation
 def get_game_rendering_positions(
     game: Game,
@@ -397,6 +477,163 @@ def get_game_rendering_positions(
     return positions
 
 
+# Where tiles come from or go to, the last number is the pattern line (0 for everything else)
+TileSource = Tuple[Literal["factory", "center_pile", "floor", "pattern_line"], int, int]
+
+POSITION_INDEX_CACHE_SIZE = 4
+HIT_CELL_SIZE = TILE_SIZE + TILE_SPACING
+
+
+# Maps screen cells to the targets that overlap them, so finding what is under the cursor
+# only has to check the few targets in one cell
+class HitGrid:
+    def __init__(self) -> None:
+        self.cells: Dict[Tuple[int, int], List[Tuple[pygame.Rect, Hashable]]] = {}
+
+    def add(self, rect: pygame.Rect, target: Hashable) -> None:
+        for x in range(
+            rect.left // HIT_CELL_SIZE, (rect.right - 1) // HIT_CELL_SIZE + 1
+        ):
+            for y in range(
+                rect.top // HIT_CELL_SIZE, (rect.bottom - 1) // HIT_CELL_SIZE + 1
+            ):
+                self.cells.setdefault((x, y), []).append((rect, target))
+
+    def find(self, point: Tuple[int, int]) -> Any:
+        cell = (point[0] // HIT_CELL_SIZE, point[1] // HIT_CELL_SIZE)
+
+        for rect, target in self.cells.get(cell, []):
+            if rect.collidepoint(point):
+                return target
+
+        return None
+
+
+# Pattern lines (and the floor) of the bottom board, only the human player's lines are highlighted
+def build_pattern_line_hit_grid() -> HitGrid:
+    hit_grid = HitGrid()
+
+    for line_index in [*range(WALL_SIZE), -1]:
+        rect = line_highlight_rect(line_index)
+        # Edges count as inside, like the rectangle that is drawn
+        hit_grid.add(pygame.Rect(rect.x, rect.y, rect.w + 1, rect.h + 1), line_index)
+
+    return hit_grid
+
+
+PATTERN_LINE_HIT_GRID = build_pattern_line_hit_grid()
+
+
+# Every tile outside of the walls with its rendering position, built in one pass over a game state
+@dataclass
+class PositionIndex:
+    # Positions in the same order as get_game_rendering_positions, don't modify the lists
+    positions: Dict[Tuple[TileSource, Union[Tile, Literal[6]]], List[Vector]] = field(
+        default_factory=dict
+    )
+    # Tiles by position in whole pixels
+    tiles: Dict[Tuple[int, int], Union[Tile, Literal[6]]] = field(default_factory=dict)
+    # Tiles that can be picked, as (factory index, tile) with -1 for the center pile
+    hit_grid: HitGrid = field(default_factory=HitGrid)
+
+    def add(
+        self, source: TileSource, tile: Union[Tile, Literal[6]], position: Vector
+    ) -> None:
+        self.positions.setdefault((source, tile), []).append(position)
+        self.tiles[grid_key(position)] = tile
+
+        if source[0] in ["factory", "center_pile"] and tile != STARTING_MARKER:
+            factory_index = source[1] if source[0] == "factory" else -1
+            # Edges count as inside
+            self.hit_grid.add(
+                pygame.Rect(
+                    int(position.x), int(position.y), TILE_SIZE + 1, TILE_SIZE + 1
+                ),
+                (factory_index, tile),
+            )
+
+    def get(self, source: TileSource, tile: Union[Tile, Literal[6]]) -> List[Vector]:
+        return self.positions.get((source, tile), [])
+
+
+def grid_key(position: Vector) -> Tuple[int, int]:
+    return (round(position.x), round(position.y))
+
+
+def build_position_index(game: Game) -> PositionIndex:
+    index = PositionIndex()
+
+    offsets = [[-1, -1], [1, -1], [-1, 1], [1, 1]]
+    for factory_index, factory in enumerate(game.factories):
+        transform = game_factory_position(factory_index)
+        factory_tiles = [tile for tile in TILE_TYPES for _ in range(factory[tile])]
+
+        for (x_off, y_off), tile in zip(offsets, factory_tiles):
+            x_pos = (x_off - 1) * (TILE_SIZE // 2) + x_off * TILE_SPACING // 2
+            y_pos = (y_off - 1) * (TILE_SIZE // 2) + y_off * TILE_SPACING // 2
+
+            index.add(
+                ("factory", factory_index, 0),
+                tile,
+                Vector(transform.x + x_pos, transform.y + y_pos),
+            )
+
+    types: List[Union[Tile, Literal[6]]] = [STARTING_MARKER, *TILE_TYPES]
+    center_tiles = [tile for tile in types for _ in range(game.center_pile[tile])]
+    for tile_index, tile in enumerate(center_tiles[: CENTER_GRID_SIZE**2]):
+        x, y = tile_index % CENTER_GRID_SIZE, tile_index // CENTER_GRID_SIZE
+
+        index.add(
+            ("center_pile", 0, 0),
+            tile,
+            Vector(
+                CENTER_PILE_RECT.x + (TILE_SIZE + TILE_SPACING) * x,
+                CENTER_PILE_RECT.y + (TILE_SIZE + TILE_SPACING) * y,
+            ),
+        )
+
+    w_transform = 1 + SECTION_SPACING
+    for player in game.players:
+        h_transform = PLAYER_HEIGHT if player.index == 1 else 0
+
+        for line_index, line in enumerate(player.pattern_lines):
+            for column_index in range(line_index - line.space, -1, -1):
+                x_pos = (TILE_SIZE + TILE_SPACING) * (WALL_SIZE - column_index - 1)
+
+                index.add(
+                    ("pattern_line", player.index, line_index),
+                    line.tile,
+                    Vector(
+                        w_transform + x_pos, h_transform + row_y_position(line_index)
+                    ),
+                )
+
+        for x, tile in enumerate(player.floor[:NUM_FLOOR_TILES]):
+            index.add(
+                ("floor", player.index, 0),
+                tile,
+                Vector(
+                    w_transform + floor_x_position(x), h_transform + FLOOR_Y_POSITION
+                ),
+            )
+
+    return index
+
+
+# The index is only built once for each game state that is rendered or animated
+def get_position_index(graphics_info: GraphicsInfo, game: Game) -> PositionIndex:
+    indexes = graphics_info.frame.position_indexes
+    key = game.to_bytes(0)
+
+    if key not in indexes:
+        if len(indexes) == POSITION_INDEX_CACHE_SIZE:
+            del indexes[next(iter(indexes))]
+
+        indexes[key] = build_position_index(game)
+
+    return indexes[key]
+
+
 def render_tile(
     graphics_info: GraphicsInfo,
     tile: Union[Tile, Literal[6]],
@@ -420,12 +657,25 @@ def render_tile_outline(
     color: Tuple[int, int, int],
     alpha: int,
 ) -> None:
+    graphics_info.canvas.blit(tile_outline(color, alpha), (position.x, position.y))
+
+
+@functools.lru_cache(maxsize=None)
+def tile_outline(color: Tuple[int, int, int], alpha: int) -> pygame.Surface:
     surface = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
     alpha_color = color + (alpha,)
 
     pygame.draw.rect(surface, alpha_color, (0, 0, TILE_SIZE, TILE_SIZE), 2)
 
-    graphics_info.canvas.blit(surface, (position.x, position.y))
+    return surface
+
+
+# Text only has to be rendered again when it changes
+@functools.lru_cache(maxsize=256)
+def render_text(
+    font: pygame.font.Font, text: str, color: Union[Tuple[int, int, int], int]
+) -> pygame.Surface:
+    return font.render(text, True, color)
 
 
 def render_factory(
@@ -439,22 +689,15 @@ def render_factory(
     player_choice: Literal["tile", "line", None] = None,
     highlighted_tile: Union[Tile, None] = None,
     is_tile_hovered: bool = False,
+    index: Union[PositionIndex, None] = None,
 ) -> None:
-    gfxdraw.aacircle(
-        graphics_info.canvas,
-        w_transform,
-        h_transform,
-        FACTORY_RADIUS,
-        COLOR_BLACK,
-    )
+    if index is None:
+        index = build_position_index(game)
 
+    # The factory's circle is part of the background
     if not no_tiles:
         for tile in TILE_TYPES:
-            positions = get_game_rendering_positions(
-                game, tile, factory_index=factory_index
-            )
-
-            for position in positions:
+            for position in index.get(("factory", factory_index, 0), tile):
                 render_tile(
                     graphics_info,
                     tile,
@@ -473,30 +716,18 @@ def render_factory(
                     render_tile_outline(graphics_info, position, color, alpha)
 
 
-def get_hovered_partial_move(game: Game) -> Union[PartialMove, None]:
-    mouse = Vector(*pygame.mouse.get_pos())
-    hover_tile: Union[Tile, None] = None
-    hover_factory: Union[int, None] = None
+def get_hovered_partial_move(
+    game: Game, index: Union[PositionIndex, None] = None
+) -> Union[PartialMove, None]:
+    if index is None:
+        index = build_position_index(game)
 
-    for factory_index in [*range(FACTORY_COUNT), -1]:
-        for tile in TILE_TYPES:
-            if factory_index == -1:
-                positions = get_game_rendering_positions(game, tile, center_pile=True)
-            else:
-                positions = get_game_rendering_positions(
-                    game, tile, factory_index=factory_index
-                )
-            for position in positions:
-                if (
-                    position.x <= mouse.x <= position.x + TILE_SIZE
-                    and position.y <= mouse.y <= position.y + TILE_SIZE
-                ):
-                    hover_tile = tile
-                    hover_factory = factory_index
-
-    if hover_factory is None or hover_tile is None:
+    target = index.hit_grid.find(pygame.mouse.get_pos())
+    if target is None:
         return None
 
+    hover_factory, hover_tile = target
+
     if hover_factory == -1:
         return PartialMove(
             drawing=hover_tile,
@@ -550,6 +781,123 @@ def get_hovered_move(game: Game, partial_move: PartialMove) -> Union[Move, None]
     )
 
 
+def player_key(player: Player) -> Hashable:
+    return (
+        player.points,
+        tuple((line.tile, line.space) for line in player.pattern_lines),
+        tuple(map(tuple, player.wall)),
+        tuple(player.floor),
+    )
+
+
+def factory_key(factory: Factory) -> Hashable:
+    return tuple(sorted((tile, count) for tile, count in factory.items() if count > 0))
+
+
+def render_center_pile(
+    game: Game,
+    graphics_info: GraphicsInfo,
+    *,
+    player_choice: Literal["tile", "line", None] = None,
+    partial_move: Union[PartialMove, None] = None,
+    index: Union[PositionIndex, None] = None,
+) -> None:
+    if index is None:
+        index = build_position_index(game)
+
+    # Create actual tiles, not the counter
+    types: List[Union[Tile, Literal[6]]] = [
+        STARTING_MARKER,
+        *TILE_TYPES,
+    ]
+
+    for tile_type in types:
+        for position in index.get(("center_pile", 0, 0), tile_type):
+            faded = partial_move is not None and (
+                partial_move.factory_index != -1 or partial_move.drawing != tile_type
+            )
+            if (
+                partial_move
+                and partial_move.factory_index == -1
+                and tile_type == STARTING_MARKER
+            ):
+                faded = False
+
+            render_tile(graphics_info, tile_type, position, faded=faded)
+
+            if player_choice is not None:
+                color = COLOR_RED if player_choice == "tile" else COLOR_GRAY
+                alpha = FADED_IMAGE_ALPHA if faded else 255
+
+                render_tile_outline(graphics_info, position, color, alpha)
+
+
+def render_ties(graphics_info: GraphicsInfo, ties: int) -> None:
+    text = render_text(graphics_info.main_font, f"Ties: {ties}", COLOR_BLACK)
+    text_rect = text.get_rect(center=TIES_RECT.center)
+    graphics_info.canvas.blit(text, text_rect)
+
+
+def analysis_lines(telemetry: Telemetry) -> List[str]:
+    move = telemetry.move
+    source = "center" if move.is_center_draw else f"factory {move.factory_index + 1}"
+    line = "floor" if move.pattern_line == -1 else f"line {move.pattern_line + 1}"
+
+    return [
+        f"Depth: {telemetry.depth}",
+        f"Score: {telemetry.score:+.2f}",
+        f"Best: {TILE_NAMES[move.drawing]}",
+        f"{source} to {line}",
+        f"{telemetry.nodes_per_second / 1000:.1f}k nodes/s",
+        f"Time: {telemetry.time:.1f}s",
+    ]
+
+
+def render_analysis(graphics_info: GraphicsInfo, lines: List[str]) -> None:
+    for index, line in enumerate(lines):
+        text = render_text(graphics_info.floor_font, line, COLOR_BLACK)
+        graphics_info.canvas.blit(
+            text,
+            (
+                ANALYSIS_RECT.x,
+                ANALYSIS_RECT.y + index * (FLOOR_FONT_SIZE + ANALYSIS_LINE_SPACING),
+            ),
+        )
+
+
+# Redraws the regions that changed since the last frame and returns the rectangles to pass to pygame.display.update
+# Regions can overlap, so every region touching a redrawn rectangle is drawn again (clipped to that rectangle)
+def render_regions(
+    graphics_info: GraphicsInfo, regions: List[Region]
+) -> List[pygame.Rect]:
+    canvas = graphics_info.canvas
+    frame = graphics_info.frame
+
+    if frame.full_redraw:
+        dirty_rects = [canvas.get_rect()]
+    else:
+        dirty_rects = [
+            region.rect
+            for region in regions
+            if frame.region_keys.get(region.name) != region.key
+        ]
+
+    for rect in dirty_rects:
+        canvas.set_clip(rect)
+        canvas.blit(graphics_info.background, rect, rect)
+
+        for region in regions:
+            if region.rect.colliderect(rect):
+                region.draw()
+
+    canvas.set_clip(None)
+
+    frame.full_redraw = False
+    frame.region_keys = {region.name: region.key for region in regions}
+
+    return dirty_rects
+
+
 def render_game(
     game: Game,
     graphics_info: GraphicsInfo,
@@ -560,34 +908,23 @@ def render_game(
     no_tiles_but_wall=False,
     player_choice: Literal["tile", "line", None] = None,
     partial_tile_move: Union[PartialMove, None] = None,
-) -> None:
-    graphics_info.canvas.fill(COLOR_WHITE)
+    analysis: Union[Telemetry, None] = None,
+) -> List[pygame.Rect]:
+    position_index = get_position_index(graphics_info, game)
 
     if player_choice is not None and partial_tile_move is None:
-        partial_move = get_hovered_partial_move(game)
-
-        if partial_move is None:
-            pygame.mouse.set_cursor(pygame.SYSTEM_CURSOR_ARROW)
-        else:
-            pygame.mouse.set_cursor(pygame.SYSTEM_CURSOR_HAND)
+        partial_move = get_hovered_partial_move(game, position_index)
 
     else:
         partial_move = partial_tile_move
-        pygame.mouse.set_cursor(pygame.SYSTEM_CURSOR_ARROW)
 
-    # Line Borders
-    pygame.draw.aaline(
-        graphics_info.canvas,
-        COLOR_BLACK,
-        (PLAYER_WIDTH, 0),
-        (PLAYER_WIDTH, TOTAL_HEIGHT),
-    )
-    pygame.draw.aaline(
-        graphics_info.canvas,
-        COLOR_BLACK,
-        (0, PLAYER_HEIGHT),
-        (PLAYER_WIDTH, PLAYER_HEIGHT),
+    highlight_lines = player_choice == "line"
+    is_hovering = (
+        player_choice is not None
+        and partial_tile_move is None
+        and partial_move is not None
     )
+    regions: List[Region] = []
 
     # Player display
     for player_index, player in enumerate(game.players):
@@ -595,15 +932,35 @@ def render_game(
         h_transform = PLAYER_HEIGHT if player_index == 1 else 0
         wins = player1_wins if player_index == 0 else player2_wins
 
-        render_player(
-            player,
-            graphics_info,
-            w_transform,
-            h_transform,
-            no_tiles_but_wall=no_tiles_but_wall,
-            wins=wins,
-            highlight_lines=player_choice == "line",
-            partial_move=partial_tile_move,
+        update_hovered_pattern_line(
+            player, get_highlighted_lines(player, highlight_lines, partial_tile_move)
+        )
+        if player.hovered_pattern_line is not None:
+            is_hovering = True
+
+        regions.append(
+            Region(
+                f"player{player_index}",
+                pygame.Rect(0, h_transform, PLAYER_WIDTH, PLAYER_HEIGHT),
+                (
+                    player_key(player),
+                    wins,
+                    no_tiles_but_wall,
+                    highlight_lines,
+                    partial_tile_move.drawing if partial_tile_move else None,
+                ),
+                lambda player=player, h_transform=h_transform, wins=wins: render_player(
+                    player,
+                    graphics_info,
+                    w_transform,
+                    h_transform,
+                    no_tiles_but_wall=no_tiles_but_wall,
+                    wins=wins,
+                    highlight_lines=highlight_lines,
+                    partial_move=partial_tile_move,
+                    index=position_index,
+                ),
+            )
         )
 
     # Factory Display
@@ -614,56 +971,79 @@ def render_game(
         if partial_move and partial_move.factory_index == index:
             highlighted_tile = partial_move.drawing
 
-        render_factory(
-            game,
-            graphics_info,
-            index,
-            int(pos.x),
-            int(pos.y),
-            no_tiles=no_tiles_but_wall,
-            player_choice=player_choice,
-            highlighted_tile=highlighted_tile,
-            is_tile_hovered=partial_move is not None,
+        regions.append(
+            Region(
+                f"factory{index}",
+                FACTORY_RECTS[index],
+                (
+                    factory_key(game.factories[index]),
+                    no_tiles_but_wall,
+                    player_choice,
+                    highlighted_tile,
+                    partial_move is not None,
+                ),
+                lambda index=index, pos=pos, highlighted_tile=highlighted_tile: render_factory(
+                    game,
+                    graphics_info,
+                    index,
+                    int(pos.x),
+                    int(pos.y),
+                    no_tiles=no_tiles_but_wall,
+                    player_choice=player_choice,
+                    highlighted_tile=highlighted_tile,
+                    is_tile_hovered=partial_move is not None,
+                    index=position_index,
+                ),
+            )
         )
 
-    # Center pile
-    # Create actual tiles, not the counter
-    if not no_tiles_but_wall:
-        types: List[Union[Tile, Literal[6]]] = [
-            STARTING_MARKER,
-            *TILE_TYPES,
-        ]
-
-        for tile_type in types:
-            positions = get_game_rendering_positions(game, tile_type, center_pile=True)
-
-            for position in positions:
-                faded = partial_move is not None and (
-                    partial_move.factory_index != -1
-                    or partial_move.drawing != tile_type
-                )
-                if (
-                    partial_move
-                    and partial_move.factory_index == -1
-                    and tile_type == STARTING_MARKER
-                ):
-                    faded = False
+    # Center pile, ties and analysis (always listed, so the region is cleared when they stop being shown)
+    def draw_center_pile() -> None:
+        if not no_tiles_but_wall:
+            render_center_pile(
+                game,
+                graphics_info,
+                player_choice=player_choice,
+                partial_move=partial_move,
+                index=position_index,
+            )
 
-                render_tile(graphics_info, tile_type, position, faded=faded)
+    def draw_ties() -> None:
+        if ties != -1:
+            render_ties(graphics_info, ties)
 
-                if player_choice is not None:
-                    color = COLOR_RED if player_choice == "tile" else COLOR_GRAY
-                    alpha = FADED_IMAGE_ALPHA if faded else 255
+    regions.append(
+        Region(
+            "center_pile",
+            CENTER_PILE_RECT,
+            (
+                factory_key(game.center_pile),
+                no_tiles_but_wall,
+                player_choice,
+                (
+                    (partial_move.factory_index, partial_move.drawing)
+                    if partial_move
+                    else None
+                ),
+            ),
+            draw_center_pile,
+        )
+    )
+    regions.append(Region("ties", TIES_RECT, ties, draw_ties))
+
+    lines = analysis_lines(analysis) if analysis is not None else []
+    regions.append(
+        Region(
+            "analysis",
+            ANALYSIS_RECT,
+            tuple(lines),
+            lambda: render_analysis(graphics_info, lines),
+        )
+    )
 
-                    render_tile_outline(graphics_info, position, color, alpha)
+    set_cursor(
+        graphics_info,
+        pygame.SYSTEM_CURSOR_HAND if is_hovering else pygame.SYSTEM_CURSOR_ARROW,
+    )
 
-    # Ties
-    if ties != -1:
-        text = graphics_info.main_font.render(f"Ties: {ties}", True, COLOR_BLACK)
-        text_rect = text.get_rect(
-            center=(
-                PLAYER_WIDTH + CENTER_SIZE / 2,
-                CENTER_SIZE - SCORE_HEIGHT / 2,
-            )
-        )
-        graphics_info.canvas.blit(text, text_rect)
+    return render_regions(graphics_info, regions)
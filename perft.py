@@ -0,0 +1,145 @@
+import argparse
+import json
+import time
+from constants import *
+from typing import Any, Dict, List, Tuple
+from game import Game, Move
+from benchmark_corpus import load_corpus
+
+
+# Everything make_move/undo_move may touch, in a form that can be compared with ==
+# Counters are compared without zero entries, since undo_move can leave them behind
+def state_snapshot(game: Game) -> Tuple[Any, ...]:
+    players = tuple(
+        (
+            player.points,
+            player.has_starting_marker,
+            tuple((line.tile, line.space) for line in player.pattern_lines),
+            tuple(tuple(row) for row in player.wall),
+            tuple(player.floor),
+            tuple(player.bonuses.row),
+            tuple(player.bonuses.col),
+            tuple(player.bonuses.diagonal),
+        )
+        for player in game.players
+    )
+    factories = tuple(
+        tuple(sorted((tile, count) for tile, count in factory.items() if count != 0))
+        for factory in [*game.factories, game.center_pile]
+    )
+
+    return (players, factories, game.is_first_round)
+
+
+class UndoMismatch(Exception):
+    def __init__(self, move: Move) -> None:
+        super().__init__()
+        # Moves leading to the failing position, filled in while the error propagates
+        self.path: List[Move] = []
+        self.move = move
+
+    def __str__(self) -> str:
+        return f"undo_move did not restore the position after {self.move} (reached by {self.path})"
+
+
+# Counts the leaf nodes of the move tree, a round ending counts as a leaf like in negascout
+def perft(game: Game, turn: int, depth: int, *, verify: bool = False) -> int:
+    if depth == 0 or game.are_no_moves():
+        return 1
+
+    nodes = 0
+    for move in game.all_moves(turn):
+        if verify:
+            before = state_snapshot(game)
+
+        game.make_move(turn, move)
+        try:
+            nodes += perft(game, (turn + 1) % 2, depth - 1, verify=verify)
+        except UndoMismatch as error:
+            error.path.insert(0, move)
+            raise
+        game.undo_move(turn, move)
+
+        if verify and state_snapshot(game) != before:
+            raise UndoMismatch(move)
+
+    return nodes
+
+
+# Leaf counts split by the first move, used to narrow down where two implementations differ
+def divide(
+    game: Game, turn: int, depth: int, *, verify: bool = False
+) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+
+    for move in game.all_moves(turn):
+        game.make_move(turn, move)
+        nodes = perft(game, (turn + 1) % 2, depth - 1, verify=verify)
+        game.undo_move(turn, move)
+
+        source = "center" if move.is_center_draw else f"factory {move.factory_index}"
+        line = "floor" if move.pattern_line == -1 else f"line {move.pattern_line}"
+        counts[f"{TILE_NAMES[move.drawing]} from {source} to {line}"] = nodes
+
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Count and verify move generation to a fixed depth"
+    )
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="Check that undo_move restores the exact position after every move",
+    )
+    parser.add_argument(
+        "--position",
+        nargs="+",
+        default=None,
+        help="Names of benchmark corpus positions (default: all of them)",
+    )
+    parser.add_argument(
+        "--file", default=None, help="Use a position saved with Game.write_to_file"
+    )
+    parser.add_argument("--divide", action="store_true")
+    args = parser.parse_args()
+
+    if args.file is not None:
+        with open(args.file, "r", encoding="utf-8") as file:
+            state = json.load(file)
+
+        game = Game(seed=0)
+        game.from_json(state)
+        positions = {args.file: (game, state["turn"] - 1)}
+    else:
+        positions = load_corpus()
+        if args.position is not None:
+            positions = {name: positions[name] for name in args.position}
+
+    total_nodes = 0
+    total_time = 0.0
+
+    for name, (game, turn) in positions.items():
+        start_time = time.perf_counter()
+        if args.divide:
+            counts = divide(game, turn, args.depth, verify=args.verify)
+            nodes = sum(counts.values())
+        else:
+            nodes = perft(game, turn, args.depth, verify=args.verify)
+        elapsed = time.perf_counter() - start_time
+
+        total_nodes += nodes
+        total_time += elapsed
+        print(
+            f"{name}: {nodes} nodes in {elapsed:.3f}s ({nodes / elapsed:.0f} nodes/second)"
+        )
+
+        if args.divide:
+            for move_name, move_nodes in counts.items():
+                print(f"    {move_name}: {move_nodes}")
+
+    print(
+        f"Total: {total_nodes} nodes in {total_time:.3f}s ({total_nodes / total_time:.0f} nodes/second)"
+    )
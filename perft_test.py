@@ -0,0 +1,30 @@
+# Known leaf counts for the benchmark corpus, any change to move generation must keep these
+import pytest
+from perft import perft
+from benchmark_corpus import load_corpus
+
+
+PERFT_DEPTH = 2
+EXPECTED_NODES = {
+    "early_0": 3710,
+    "mid_0": 122,
+    "late_0": 28,
+    "early_1": 3745,
+    "mid_1": 1560,
+    "late_1": 47,
+    "early_2": 3245,
+    "mid_2": 176,
+    "late_2": 75,
+    "early_3": 2690,
+    "mid_3": 337,
+    "late_3": 53,
+}
+
+
+CORPUS = load_corpus()
+
+
+@pytest.mark.parametrize("name", list(EXPECTED_NODES))
+def test_perft(name: str):
+    game, turn = CORPUS[name]
+    assert perft(game, turn, PERFT_DEPTH, verify=True) == EXPECTED_NODES[name]
@@ -0,0 +1,162 @@
+import os
+import struct
+from constants import *
+from typing import Iterator, List, Literal, Tuple, Union
+from dataset import FEATURE_COUNT
+from game import Game, SNAPSHOT
+import numpy as np
+
+
+# Every file starts with a header so that records of an older snapshot layout are never misread
+STORE_MAGIC = b"AZPS"
+STORE_HEADER = struct.Struct("!4sHH")
+
+# A record is a Game.to_bytes snapshot followed by the position's score
+RECORD_DTYPE = np.dtype([("snapshot", f"V{SNAPSHOT.size}"), ("score", "<f4")])
+
+StoredPosition = Tuple[Game, Literal[0, 1], float]
+
+
+# Append-only file of fixed-size position records, read through a memory map so any record
+# can be loaded by index without reading the rest of the file
+class PositionStore:
+    def __init__(self, path: str = POSITION_STORE_FILE) -> None:
+        self.path = path
+
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            with open(path, "wb") as file:
+                file.write(
+                    STORE_HEADER.pack(
+                        STORE_MAGIC, SNAPSHOT_VERSION, RECORD_DTYPE.itemsize
+                    )
+                )
+
+        with open(path, "rb") as file:
+            magic, version, record_size = STORE_HEADER.unpack(
+                file.read(STORE_HEADER.size)
+            )
+
+        if magic != STORE_MAGIC:
+            raise Exception(f"{path} is not a position store")
+        if version != SNAPSHOT_VERSION:
+            raise Exception(
+                f"{path} stores snapshot version {version}, expected {SNAPSHOT_VERSION}"
+            )
+        if record_size != RECORD_DTYPE.itemsize:
+            raise Exception(
+                f"{path} stores records of {record_size} bytes, expected {RECORD_DTYPE.itemsize}"
+            )
+
+        self.records: Union[np.memmap, None] = None
+        self.map_records()
+
+    # A memory map has a fixed length, so it is recreated after the file grows or shrinks
+    def map_records(self) -> None:
+        # A record that was only partly written before a crash is ignored
+        num_records = (
+            os.path.getsize(self.path) - STORE_HEADER.size
+        ) // RECORD_DTYPE.itemsize
+
+        if num_records == 0:
+            self.records = None
+        else:
+            self.records = np.memmap(
+                self.path,
+                dtype=RECORD_DTYPE,
+                mode="r",
+                offset=STORE_HEADER.size,
+                shape=(num_records,),
+            )
+
+    def __len__(self) -> int:
+        return 0 if self.records is None else len(self.records)
+
+    def __getitem__(self, index: int) -> StoredPosition:
+        if self.records is None:
+            raise IndexError(index)
+
+        record = self.records[index]
+        game, turn = Game.from_bytes(record["snapshot"].tobytes())
+
+        return game, turn, float(record["score"])
+
+    def append(self, positions: List[StoredPosition]) -> None:
+        self.append_snapshots(
+            [(game.to_bytes(turn), score) for game, turn, score in positions]
+        )
+
+    # Snapshots are much cheaper than games to send back from pool workers
+    def append_snapshots(self, snapshots: List[Tuple[bytes, float]]) -> None:
+        if len(snapshots) == 0:
+            return
+
+        records = np.empty(len(snapshots), dtype=RECORD_DTYPE)
+        for index, (snapshot, score) in enumerate(snapshots):
+            records[index] = (snapshot, score)
+
+        # Anything after the last whole record is left over from an interrupted write
+        with open(self.path, "r+b") as file:
+            file.seek(STORE_HEADER.size + len(self) * RECORD_DTYPE.itemsize)
+            file.write(records.tobytes())
+            file.truncate()
+            file.flush()
+            os.fsync(file.fileno())
+
+        self.map_records()
+
+    # Discards records written after the last known good state (eg. a game that was never logged)
+    def truncate(self, num_records: int) -> None:
+        if num_records > len(self):
+            raise Exception(f"{self.path} only has {len(self)} positions")
+
+        self.records = None
+        with open(self.path, "r+b") as file:
+            file.truncate(STORE_HEADER.size + num_records * RECORD_DTYPE.itemsize)
+
+        self.map_records()
+
+    def scores(self) -> np.ndarray:
+        if self.records is None:
+            return np.empty(0, dtype=np.float32)
+
+        return self.records["score"]
+
+    def index_batches(
+        self, batch_size: int, *, shuffle: bool = False, seed: Union[int, None] = None
+    ) -> Iterator[np.ndarray]:
+        order = np.arange(len(self))
+        if shuffle:
+            order = np.random.default_rng(seed).permutation(order)
+
+        for start in range(0, len(order), batch_size):
+            # Sorted so that every batch reads the file front to back
+            yield np.sort(order[start : start + batch_size])
+
+    # Yields lists of (game, turn, score)
+    def iterate_positions(
+        self,
+        batch_size: int = 1024,
+        *,
+        shuffle: bool = False,
+        seed: Union[int, None] = None,
+    ) -> Iterator[List[StoredPosition]]:
+        for indices in self.index_batches(batch_size, shuffle=shuffle, seed=seed):
+            yield [self[int(index)] for index in indices]
+
+    # Yields (features, scores) batches in the same layout as dataset.iterate_batches
+    def iterate_features(
+        self,
+        batch_size: int = 1024,
+        *,
+        shuffle: bool = False,
+        seed: Union[int, None] = None,
+    ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        for positions in self.iterate_positions(batch_size, shuffle=shuffle, seed=seed):
+            features = np.empty((len(positions), FEATURE_COUNT), dtype=np.float32)
+            scores = np.empty(len(positions), dtype=np.float32)
+
+            for index, (game, _, score) in enumerate(positions):
+                features[index] = game.features(game.calculate_points())
+                scores[index] = score
+
+            yield features, scores
@@ -0,0 +1,120 @@
+from constants import *
+import numpy as np
+import pytest
+from benchmark_corpus import load_corpus
+from position_store import (
+    RECORD_DTYPE,
+    STORE_HEADER,
+    STORE_MAGIC,
+    PositionStore,
+)
+
+
+CORPUS = load_corpus()
+POSITIONS = [
+    (game, turn, index / 4) for index, (game, turn) in enumerate(CORPUS.values())
+]
+
+
+def assert_same_positions(store: PositionStore):
+    assert len(store) == len(POSITIONS)
+
+    for index, (game, turn, score) in enumerate(POSITIONS):
+        stored_game, stored_turn, stored_score = store[index]
+        assert stored_game.to_bytes(stored_turn) == game.to_bytes(turn)
+        assert stored_score == score
+
+
+def test_append_and_reopen(tmp_path):
+    path = str(tmp_path / "positions.bin")
+    store = PositionStore(path)
+    assert len(store) == 0
+
+    store.append(POSITIONS[:5])
+    store.append_snapshots(
+        [(game.to_bytes(turn), score) for game, turn, score in POSITIONS[5:]]
+    )
+    assert_same_positions(store)
+
+    reopened = PositionStore(path)
+    assert_same_positions(reopened)
+    assert list(reopened.scores()) == [score for _, _, score in POSITIONS]
+
+    with pytest.raises(IndexError):
+        reopened[len(POSITIONS)]
+
+
+def test_interrupted_append(tmp_path):
+    path = str(tmp_path / "positions.bin")
+    PositionStore(path).append(POSITIONS[:3])
+
+    # Half a record written before a crash is ignored, then overwritten
+    with open(path, "ab") as file:
+        file.write(b"\0" * (RECORD_DTYPE.itemsize // 2))
+
+    store = PositionStore(path)
+    assert len(store) == 3
+
+    store.append(POSITIONS[3:])
+    assert_same_positions(PositionStore(path))
+
+
+def test_truncate(tmp_path):
+    path = str(tmp_path / "positions.bin")
+    store = PositionStore(path)
+    store.append(POSITIONS)
+
+    store.truncate(4)
+    assert len(store) == 4
+    assert len(PositionStore(path)) == 4
+
+    with pytest.raises(Exception, match="only has 4 positions"):
+        store.truncate(5)
+
+    store.truncate(0)
+    assert len(store) == 0
+    store.append(POSITIONS)
+    assert_same_positions(store)
+
+
+@pytest.mark.parametrize(
+    "header, message",
+    [
+        (
+            STORE_HEADER.pack(b"NOPE", SNAPSHOT_VERSION, RECORD_DTYPE.itemsize),
+            "not a position store",
+        ),
+        (
+            STORE_HEADER.pack(STORE_MAGIC, SNAPSHOT_VERSION + 1, RECORD_DTYPE.itemsize),
+            "snapshot version",
+        ),
+        (
+            STORE_HEADER.pack(STORE_MAGIC, SNAPSHOT_VERSION, RECORD_DTYPE.itemsize + 1),
+            "records of",
+        ),
+    ],
+)
+def test_rejects_other_headers(tmp_path, header: bytes, message: str):
+    path = tmp_path / "positions.bin"
+    path.write_bytes(header)
+
+    with pytest.raises(Exception, match=message):
+        PositionStore(str(path))
+
+
+def test_iterate_features(tmp_path):
+    store = PositionStore(str(tmp_path / "positions.bin"))
+    store.append(POSITIONS)
+
+    batches = list(store.iterate_features(5, shuffle=True, seed=0))
+    assert [len(scores) for _, scores in batches] == [5, 5, 2]
+
+    features = np.concatenate([features for features, _ in batches])
+    scores = np.concatenate([scores for _, scores in batches])
+    expected = {
+        score: game.features(game.calculate_points()) for game, _, score in POSITIONS
+    }
+
+    assert sorted(scores) == sorted(expected)
+    for row, score in zip(features, scores):
+        assert list(row) == expected[score]
@@ -0,0 +1,129 @@
+import cProfile
+import glob
+import os
+import pstats
+import shutil
+import signal
+from collections import Counter
+from constants import *
+from types import FrameType
+from typing import Any, Callable, Dict, Union
+
+
+# Profiling state of the current worker process, created by its first profiled task
+profiler: Union[cProfile.Profile, None] = None
+stack_samples: Counter[str] = Counter()
+
+
+def frame_name(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}:{code.co_firstlineno}"
+
+
+# Runs a pool task under cProfile and a stack sampler, saving the worker's totals after every task
+# Totals are saved per task because pool workers are terminated without running any exit handlers
+class ProfiledTask:
+    def __init__(
+        self, function: Callable[..., Any], directory: str, sample_interval: float
+    ) -> None:
+        self.function = function
+        self.directory = directory
+        self.sample_interval = sample_interval
+
+    def sample(self, signal_number: int, frame: Union[FrameType, None]) -> None:
+        names = []
+
+        # Only frames below this task are kept, the pool's own frames are the same for every sample
+        while frame is not None and frame.f_code is not ProfiledTask.__call__.__code__:
+            names.append(frame_name(frame))
+            frame = frame.f_back
+
+        if len(names) > 0:
+            stack_samples[";".join(reversed(names))] += 1
+
+    def __call__(self, *args: Any) -> Any:
+        global profiler
+
+        if profiler is None:
+            profiler = cProfile.Profile()
+
+        # Sampling uses CPU time, so only time spent working is sampled (not available on Windows)
+        can_sample = hasattr(signal, "setitimer")
+        if can_sample:
+            signal.signal(signal.SIGPROF, self.sample)
+            signal.setitimer(
+                signal.ITIMER_PROF, self.sample_interval, self.sample_interval
+            )
+
+        profiler.enable()
+        try:
+            return self.function(*args)
+        finally:
+            profiler.disable()
+            if can_sample:
+                signal.setitimer(signal.ITIMER_PROF, 0)
+
+            path = os.path.join(self.directory, f"worker_{os.getpid()}")
+            profiler.dump_stats(path + ".prof")
+            write_stacks(path + ".stacks", stack_samples)
+
+
+def write_stacks(path: str, samples: Dict[str, int]) -> None:
+    with open(path, "w", encoding="utf-8") as file:
+        for stack, count in samples.items():
+            file.write(f"{stack} {count}\n")
+
+
+def read_stacks(path: str) -> Counter[str]:
+    samples: Counter[str] = Counter()
+
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            stack, count = line.rsplit(" ", 1)
+            samples[stack] += int(count)
+
+    return samples
+
+
+# Profiles every task a pool runs and merges the results of all workers
+class Profiler:
+    def __init__(
+        self,
+        directory: str = PROFILE_DIRECTORY,
+        sample_interval: float = PROFILE_SAMPLE_INTERVAL,
+    ) -> None:
+        self.directory = directory
+        self.sample_interval = sample_interval
+
+        # Results of an earlier run would otherwise be merged into this one
+        shutil.rmtree(os.path.join(directory, "workers"), ignore_errors=True)
+        os.makedirs(os.path.join(directory, "workers"))
+
+    def wrap(self, function: Callable[..., Any]) -> ProfiledTask:
+        return ProfiledTask(
+            function, os.path.join(self.directory, "workers"), self.sample_interval
+        )
+
+    # Writes profile.prof (for pstats/snakeviz) and stacks.txt (collapsed stacks for flamegraph.pl/speedscope)
+    # and prints the functions that took the most time
+    def report(self, sort: str = "cumulative", limit: int = 30) -> None:
+        profiles = glob.glob(os.path.join(self.directory, "workers", "*.prof"))
+
+        if len(profiles) == 0:
+            print("No profiled tasks finished")
+            return
+
+        stats = pstats.Stats(*profiles)
+        stats.dump_stats(os.path.join(self.directory, "profile.prof"))
+
+        samples: Counter[str] = Counter()
+        for path in glob.glob(os.path.join(self.directory, "workers", "*.stacks")):
+            samples.update(read_stacks(path))
+
+        write_stacks(os.path.join(self.directory, "stacks.txt"), samples)
+
+        print(f"Profile of {len(profiles)} workers:")
+        stats.sort_stats(sort).print_stats(limit)
+        print(
+            f"Saved {os.path.join(self.directory, 'profile.prof')} and {sum(samples.values())} stack samples in {os.path.join(self.directory, 'stacks.txt')}"
+        )
@@ -0,0 +1,303 @@
+import os
+
+# Frames are only saved to files, so no window is opened
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"
+# SDL would otherwise turn SIGTERM into a quit event, and the pool could never stop its workers
+os.environ["SDL_NO_SIGNAL_HANDLERS"] = "1"
+
+import argparse
+import glob
+import json
+import shutil
+import time
+from constants import *
+from typing import Any, Callable, List, Tuple, Union
+from game import Game
+from game_record import GameRecord, decode_move, read_records, replay
+from animation import Animation
+import graphics
+from workers import create_pool
+import pygame
+from tqdm import tqdm
+
+
+# Graphics of the current worker process, created by its first task
+graphics_info: Union[graphics.GraphicsInfo, None] = None
+
+
+def get_graphics() -> graphics.GraphicsInfo:
+    global graphics_info
+
+    if graphics_info is None:
+        graphics_info = graphics.init()
+
+    # The canvas may still show the last frame of another game
+    graphics.invalidate(graphics_info)
+
+    return graphics_info
+
+
+# The file type follows from the extension, compressing PNGs takes far longer than rendering
+def save_frame(
+    info: graphics.GraphicsInfo, directory: str, name: str, extension: str
+) -> None:
+    pygame.image.save(info.canvas, os.path.join(directory, f"{name}.{extension}"))
+
+
+# Renders every frame of an animation (without waiting between frames) and returns the next frame number
+def render_animation(
+    info: graphics.GraphicsInfo,
+    animation: Animation,
+    directory: str,
+    extension: str,
+    ply: int,
+    frame: int,
+) -> int:
+    while not animation.finished:
+        graphics.render_game(animation.old_game, info, no_tiles_but_wall=True)
+        animation.render()
+        save_frame(info, directory, f"{ply:03d}_{frame:03d}", extension)
+
+        animation.update()
+        frame += 1
+
+    return frame
+
+
+# Frames of moves start to end are named <ply>_<frame>, frame 000 being the position before the move
+# (or the final position after the last move), followed by the move's animation and the wall tiling
+def render_record_chunk(
+    record: GameRecord,
+    directory: str,
+    extension: str,
+    start: int,
+    end: int,
+    animate: bool,
+) -> int:
+    info = get_graphics()
+    frames = 0
+
+    for game, turn, ply in replay(record):
+        if ply < start:
+            continue
+        if ply >= end:
+            break
+
+        graphics.render_game(game, info)
+        save_frame(info, directory, f"{ply:03d}_000", extension)
+        frames += 1
+
+        if ply == len(record["moves"]) or not animate:
+            continue
+
+        move = decode_move(game, turn, record["moves"][ply])
+        new_game = game.copy()
+        new_game.make_move(turn, move)
+
+        frame = render_animation(
+            info,
+            Animation(turn, game, move, new_game, info),
+            directory,
+            extension,
+            ply,
+            1,
+        )
+
+        if new_game.is_round_over():
+            scored_game = new_game.copy()
+            scored_game.calculate_points_and_modify()
+
+            frame = render_animation(
+                info,
+                Animation(turn, new_game, None, scored_game, info),
+                directory,
+                extension,
+                ply,
+                frame,
+            )
+
+        frames += frame - 1
+
+    return frames
+
+
+def render_snapshot_chunk(
+    snapshots: List[dict], directory: str, extension: str, start: int
+) -> int:
+    info = get_graphics()
+
+    for index, snapshot in enumerate(snapshots):
+        game = Game(seed=0)
+        game.from_json(snapshot)
+
+        graphics.render_game(game, info)
+        save_frame(info, directory, f"{start + index:04d}", extension)
+
+    return len(snapshots)
+
+
+# Combines a directory of frames into one GIF, positions are shown for as long as battle.py pauses after a move
+# Pillow is only needed for GIFs
+def load_pillow() -> Any:
+    try:
+        from PIL import Image
+    except ImportError:
+        raise Exception("Writing GIFs needs Pillow (pip install pillow)")
+
+    return Image
+
+
+def write_gif(directory: str, extension: str) -> str:
+    Image = load_pillow()
+
+    paths = sorted(glob.glob(os.path.join(directory, f"*.{extension}")))
+    durations = [
+        (
+            int(PAUSE_TIME_AFTER_MOVE * 1000)
+            if path.endswith(f"_000.{extension}") or "_" not in os.path.basename(path)
+            else 1000 // FRAME_RATE
+        )
+        for path in paths
+    ]
+
+    # Frames are opened one at a time, a whole game does not fit in memory
+    frames = (Image.open(path) for path in paths[1:])
+
+    output = directory.rstrip(os.sep) + ".gif"
+    Image.open(paths[0]).save(
+        output,
+        save_all=True,
+        append_images=frames,
+        duration=durations,
+        loop=0,
+        optimize=False,
+    )
+
+    return output
+
+
+def read_snapshots(path: str) -> List[dict]:
+    with open(path, "r", encoding="utf-8") as file:
+        if path.endswith(".jsonl"):
+            return [json.loads(line) for line in file if line.strip() != ""]
+
+        snapshots = json.load(file)
+
+    # A single to_json snapshot (eg. game_state.json) or a list of them
+    return snapshots if isinstance(snapshots, list) else [snapshots]
+
+
+def run_task(task: Tuple[Callable[..., Any], Tuple[Any, ...]]) -> Any:
+    function, args = task
+    return function(*args)
+
+
+def clear_directory(directory: str) -> None:
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Render recorded games or to_json snapshots to PNG frames without opening a window"
+    )
+    parser.add_argument(
+        "--records",
+        default=GAME_RECORD_FILE,
+        help="Game records saved by compare.py --record",
+    )
+    parser.add_argument(
+        "--games",
+        type=int,
+        nargs="+",
+        default=None,
+        help="Indices of the games to render (default: all of them)",
+    )
+    parser.add_argument(
+        "--snapshots",
+        nargs="+",
+        default=None,
+        help="JSON files of Game.to_json snapshots (one, a list or one per line in .jsonl) to render instead of records",
+    )
+    parser.add_argument("--output", default=REPLAY_DIRECTORY)
+    parser.add_argument(
+        "--format",
+        choices=["png", "bmp", "tga", "jpg"],
+        default="png",
+        help="Image type of the frames (bmp is by far the fastest to save)",
+    )
+    parser.add_argument(
+        "--no-animation",
+        action="store_true",
+        help="Only render the position before every move",
+    )
+    parser.add_argument(
+        "--gif",
+        action="store_true",
+        help="Also combine the frames of every game into a GIF (needs Pillow)",
+    )
+    args = parser.parse_args()
+
+    # Fail before anything is rendered
+    if args.gif:
+        load_pillow()
+
+    # Long games are split into chunks of moves, so one game is also rendered in parallel
+    tasks: List[Tuple[Callable[..., Any], Tuple[Any, ...]]] = []
+    directories: List[str] = []
+
+    if args.snapshots is not None:
+        for path in args.snapshots:
+            snapshots = read_snapshots(path)
+            directory = os.path.join(
+                args.output, os.path.splitext(os.path.basename(path))[0]
+            )
+            clear_directory(directory)
+            directories.append(directory)
+
+            for start in range(0, len(snapshots), REPLAY_CHUNK_PLIES):
+                chunk = snapshots[start : start + REPLAY_CHUNK_PLIES]
+                tasks.append(
+                    (render_snapshot_chunk, (chunk, directory, args.format, start))
+                )
+
+    else:
+        records = read_records(args.records)
+        indices = args.games if args.games is not None else range(len(records))
+
+        for index in indices:
+            record = records[index]
+            directory = os.path.join(args.output, f"game_{index:04d}")
+            clear_directory(directory)
+            directories.append(directory)
+
+            # The position after the last move is rendered as well
+            for start in range(0, len(record["moves"]) + 1, REPLAY_CHUNK_PLIES):
+                end = start + REPLAY_CHUNK_PLIES
+                tasks.append(
+                    (
+                        render_record_chunk,
+                        (
+                            record,
+                            directory,
+                            args.format,
+                            start,
+                            end,
+                            not args.no_animation,
+                        ),
+                    )
+                )
+
+    start_time = time.perf_counter()
+    with create_pool() as pool:
+        frames = sum(tqdm(pool.imap_unordered(run_task, tasks), total=len(tasks)))
+        elapsed = time.perf_counter() - start_time
+        print(
+            f"Rendered {frames} frames of {len(directories)} games in {elapsed:.1f}s ({frames / elapsed:.0f} frames/second)"
+        )
+
+        if args.gif:
+            gifs = [(directory, args.format) for directory in directories]
+            for output in pool.starmap(write_gif, gifs):
+                print(f"Saved {output}")
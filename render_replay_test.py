@@ -0,0 +1,38 @@
+import os
+from game_record_test import record_random_game
+from render_replay import render_record_chunk, render_snapshot_chunk
+from game_record import position_at
+
+
+def test_render_record_chunk(tmp_path):
+    record, _ = record_random_game(0)
+
+    frames = render_record_chunk(record, str(tmp_path), "bmp", 0, 2, True)
+    names = sorted(os.listdir(tmp_path))
+
+    assert frames == len(names)
+    assert [name for name in names if name.endswith("_000.bmp")] == [
+        "000_000.bmp",
+        "001_000.bmp",
+    ]
+    assert "000_001.bmp" in names and "002_000.bmp" not in names
+
+
+def test_render_last_position(tmp_path):
+    record, _ = record_random_game(1)
+    last_ply = len(record["moves"])
+
+    frames = render_record_chunk(
+        record, str(tmp_path), "bmp", last_ply - 1, last_ply + 1, False
+    )
+
+    assert frames == 2
+    assert sorted(os.listdir(tmp_path))[-1] == f"{last_ply:03d}_000.bmp"
+
+
+def test_render_snapshots(tmp_path):
+    record, _ = record_random_game(2)
+    snapshots = [position_at(record, ply)[0].to_json(0) for ply in range(3)]
+
+    assert render_snapshot_chunk(snapshots, str(tmp_path), "bmp", 5) == 3
+    assert sorted(os.listdir(tmp_path)) == ["0005.bmp", "0006.bmp", "0007.bmp"]
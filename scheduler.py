@@ -0,0 +1,115 @@
+from constants import *
+from typing import Callable, Dict, List, Tuple
+from multiprocessing.pool import Pool
+import queue
+
+
+# (solution index, seed, first player)
+GameTask = Tuple[int, int, int]
+
+
+# Plays every (solution, seed, first player) game of a generation in one shared pool
+# Games are handed out one at a time, so a worker that finishes early immediately takes the next game,
+# and solutions that fall behind in the race have their remaining games cancelled
+class GameScheduler:
+    def __init__(
+        self,
+        pool: Pool,
+        play: Callable[..., int],
+        *,
+        in_flight: int,
+        race_checkpoints: List[int],
+        race_keep_fraction: float,
+        race_min_results: int,
+    ) -> None:
+        self.pool = pool
+        self.play = play
+        self.in_flight = in_flight
+        self.race_checkpoints = race_checkpoints
+        self.race_keep_fraction = race_keep_fraction
+        self.race_min_results = race_min_results
+
+    def is_behind(
+        self, race_results: Dict[int, List[float]], pairs_played: int, fitness: float
+    ) -> bool:
+        others = race_results.setdefault(pairs_played, [])
+        behind = False
+
+        if len(others) >= self.race_min_results:
+            ranked = sorted(others, reverse=True)
+            behind = fitness < ranked[int(len(ranked) * self.race_keep_fraction)]
+
+        others.append(fitness)
+
+        return behind
+
+    # Returns the fitness of every solution (the summed score difference over all of its games)
+    def run(self, solutions: List[List[float]], seeds: List[int]) -> List[float]:
+        # Ordered by seed so that every solution reaches each race checkpoint at about the same time
+        tasks: List[GameTask] = [
+            (solution_index, seed, first_player)
+            for seed in seeds
+            for solution_index in range(len(solutions))
+            for first_player in [0, 1]
+        ]
+        tasks.reverse()
+
+        fitness = [0.0] * len(solutions)
+        games_played = [0] * len(solutions)
+        stopped = [False] * len(solutions)
+        race_results: Dict[int, List[float]] = {}
+
+        finished: queue.Queue[Tuple[GameTask, int]] = queue.Queue()
+        errors: queue.Queue[BaseException] = queue.Queue()
+        running = 0
+
+        def submit() -> None:
+            nonlocal running
+
+            while running < self.in_flight and len(tasks) > 0:
+                task = tasks.pop()
+                solution_index, seed, first_player = task
+
+                if stopped[solution_index]:
+                    continue
+
+                self.pool.apply_async(
+                    self.play,
+                    (solutions[solution_index], seed, first_player),
+                    callback=lambda result, task=task: finished.put((task, result)),
+                    error_callback=errors.put,
+                )
+                running += 1
+
+        submit()
+        while running > 0:
+            try:
+                task, result = finished.get(timeout=1)
+            except queue.Empty:
+                if not errors.empty():
+                    raise errors.get()
+                continue
+
+            running -= 1
+            solution_index = task[0]
+            fitness[solution_index] += result
+            games_played[solution_index] += 1
+
+            pairs_played = games_played[solution_index] // 2
+            if (
+                not stopped[solution_index]
+                and games_played[solution_index] % 2 == 0
+                and pairs_played in self.race_checkpoints
+                and pairs_played < len(seeds)
+                and self.is_behind(race_results, pairs_played, fitness[solution_index])
+            ):
+                stopped[solution_index] = True
+
+            submit()
+
+        # Solutions that stopped early get an estimate of their full fitness
+        for solution_index in range(len(solutions)):
+            if stopped[solution_index]:
+                fitness[solution_index] *= 2 * len(seeds) / games_played[solution_index]
+
+        return fitness
@@ -0,0 +1,64 @@
+from typing import Any, Callable, List
+import pytest
+from scheduler import GameScheduler
+
+
+# Plays every game as soon as it is submitted, so the order of results is fixed
+class ImmediatePool:
+    def apply_async(
+        self,
+        func: Callable[..., Any],
+        args: Any,
+        callback: Callable[[Any], None],
+        error_callback: Callable[[BaseException], None],
+    ) -> None:
+        try:
+            result = func(*args)
+        except BaseException as error:
+            error_callback(error)
+        else:
+            callback(result)
+
+
+def create_scheduler(play: Callable[..., int]) -> GameScheduler:
+    return GameScheduler(
+        ImmediatePool(),  # type: ignore
+        play,
+        in_flight=1,
+        race_checkpoints=[2, 4],
+        race_keep_fraction=0.5,
+        race_min_results=2,
+    )
+
+
+def test_losing_solutions_stop_early():
+    games: List[float] = []
+
+    # Every solution scores its only weight in each of its games
+    def play(solution: List[float], seed: int, first_player: int) -> int:
+        games.append(solution[0])
+        return int(solution[0])
+
+    fitness = create_scheduler(play).run([[3], [2], [1], [-5]], list(range(6)))
+
+    # The two weakest solutions fall behind at the first checkpoint (2 seed pairs), and their fitness
+    # is extrapolated to all 6 seed pairs
+    assert fitness == [36, 24, 12, -60]
+    assert games.count(3) == games.count(2) == 12
+    assert games.count(1) == games.count(-5) == 4
+
+
+def test_no_race_before_enough_results():
+    fitness = create_scheduler(lambda solution, seed, first_player: solution[0]).run(
+        [[-1], [1]], list(range(3))
+    )
+
+    assert fitness == [-6, 6]
+
+
+def test_game_errors_are_raised():
+    def play(solution: List[float], seed: int, first_player: int) -> int:
+        raise ValueError("broken solution")
+
+    with pytest.raises(ValueError, match="broken solution"):
+        create_scheduler(play).run([[0]], [0])
@@ -1,9 +1,9 @@
-from typing import Any, Tuple, Literal, List, Dict, Union, TypedDict
+from typing import Any, Iterable, Tuple, Literal, List, Dict, Union, TypedDict
 from constants import *
 from evaluation import EvaluationVersion, game_evaluation_for_player
 from game import Game, Move
-from tqdm import tqdm
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+import math
 import time
 import pickle
 from multiprocessing.connection import Connection
@@ -23,10 +23,140 @@ class EvaluatedNode:
     nodes_searched: int
 
 
+# Statistics for one iteration of iterative deepening, only collected when asked for
+@dataclass
+class DepthStats:
+    depth: int
+    time: float = 0
+    nodes: int = 0
+    unique_nodes: int = 0
+    # Leaf nodes of this iteration divided by those of the previous one
+    branching_factor: Union[float, None] = None
+    cutoffs: int = 0
+    first_move_cutoffs: int = 0
+    # Null window searches that failed high and had to be searched again
+    re_searches: int = 0
+    # Nodes whose moves were skipped because their score bounds were outside the window
+    futility_prunes: int = 0
+    evaluation_time: float = 0
+    move_generation_time: float = 0
+    # False if the time ran out during this iteration
+    completed: bool = True
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.time if self.time > 0 else 0
+
+    @property
+    def first_move_cutoff_rate(self) -> Union[float, None]:
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs > 0 else None
+
+
+@dataclass
+class SearchStats:
+    depths: List[DepthStats] = field(default_factory=list)
+
+    @property
+    def time(self) -> float:
+        return sum(depth.time for depth in self.depths)
+
+    @property
+    def nodes(self) -> int:
+        return sum(depth.nodes for depth in self.depths)
+
+    # Deepest iteration that finished before the time ran out
+    @property
+    def completed_depth(self) -> Union[int, None]:
+        completed = [depth.depth for depth in self.depths if depth.completed]
+        return completed[-1] if len(completed) > 0 else None
+
+    def __str__(self) -> str:
+        # Iterations that ran out of time are marked with *
+        lines = [
+            "depth   time(s)      nodes  nodes/s   ebf  first cutoff  re-searches  futility  eval(s)  movegen(s)"
+        ]
+        for depth in self.depths:
+            branching_factor = (
+                "-"
+                if depth.branching_factor is None
+                else f"{depth.branching_factor:.2f}"
+            )
+            cutoff_rate = (
+                "-"
+                if depth.first_move_cutoff_rate is None
+                else f"{depth.first_move_cutoff_rate:.0%}"
+            )
+            lines.append(
+                f"{depth.depth:>4}{' ' if depth.completed else '*'} {depth.time:>9.3f} {depth.nodes:>10} {depth.nodes_per_second:>8.0f} {branching_factor:>5} {cutoff_rate:>13} {depth.re_searches:>12} {depth.futility_prunes:>9} {depth.evaluation_time:>8.3f} {depth.move_generation_time:>11.3f}"
+            )
+
+        return "\n".join(lines)
+
+
 @dataclass
 class FinalResult(EvaluatedNode):
     move: Move
     move_order: List[Move]
+    stats: Union[SearchStats, None] = None
+
+
+# What the engine is thinking while it searches
+@dataclass
+class Telemetry:
+    depth: int
+    score: float
+    # Best root move so far in this iteration (the search doesn't keep a longer principal variation)
+    move: Move
+    nodes: int
+    time: float
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.time if self.time > 0 else 0
+
+
+# Sends at most rate telemetry messages per second, updates in between only replace the pending one
+class TelemetryChannel:
+    def __init__(
+        self,
+        connection: Connection,
+        rate: float = TELEMETRY_RATE,
+        resolution: Union[int, None] = None,
+    ) -> None:
+        self.connection = connection
+        self.interval = 1 / rate
+        self.resolution = resolution
+        self.start_time = time.perf_counter()
+        self.last_sent = self.start_time - self.interval
+        # Nodes searched by the finished iterations
+        self.previous_nodes = 0
+        self.pending: Union[Telemetry, None] = None
+
+    def update(self, depth: int, score: float, move: Move, nodes: int) -> None:
+        now = time.perf_counter()
+        self.pending = Telemetry(
+            depth=depth,
+            score=score if self.resolution is None else score / self.resolution,
+            move=move,
+            nodes=self.previous_nodes + nodes,
+            time=now - self.start_time,
+        )
+
+        if now - self.last_sent >= self.interval:
+            self.send(now)
+
+    def finish_iteration(self, nodes: int) -> None:
+        self.previous_nodes += nodes
+
+    # Sends the latest update even if it is too soon (eg. before the best move)
+    def flush(self) -> None:
+        self.send(time.perf_counter())
+
+    def send(self, now: float) -> None:
+        if self.pending is not None:
+            self.connection.send({"data": self.pending, "type": TELEMETRY})
+            self.pending = None
+            self.last_sent = now
 
 
 class ConnectionData(TypedDict):
@@ -47,12 +177,22 @@ def get_best_move(
     show_progress: bool = True,
     connection: Union[Connection, None] = None,
     depth_limit: Union[int, None] = None,
+    collect_stats: bool = False,
+    telemetry_rate: float = TELEMETRY_RATE,
+    resolution: Union[int, None] = EVALUATION_RESOLUTION,
+    futility_margin: Union[float, None] = FUTILITY_MARGIN,
 ) -> FinalResult:
     total_nodes = 0
     unique_nodes = 0
     start_time = time.perf_counter()
     result: Union[EvaluatedNode, FinalResult, None] = None
     move_order: List[Move] = []
+    stats = SearchStats() if collect_stats else None
+    telemetry = (
+        TelemetryChannel(connection, telemetry_rate, resolution)
+        if connection != None
+        else None
+    )
 
     player_eval = player1_eval if turn == 0 else player2_eval
 
@@ -61,9 +201,6 @@ def get_best_move(
         depth_limit = 4 * FACTORY_COUNT
 
     for depth in range(1, depth_limit + 1):
-        if connection != None:
-            connection.send({"data": depth, "type": DEPTH})
-
         current_time = time.perf_counter()
         time_left = start_time - current_time + search_time
 
@@ -72,6 +209,9 @@ def get_best_move(
 
         # print(move_order)
 
+        depth_stats = DepthStats(depth=depth) if stats is not None else None
+        iteration_start = time.perf_counter()
+
         result = negascout(
             player_eval,
             game.copy(),
@@ -81,9 +221,28 @@ def get_best_move(
             move_order=move_order,
             time_left=time_left,
             show_progress=show_progress,
-            connection=connection,
+            telemetry=telemetry,
+            stats=depth_stats,
+            resolution=resolution,
+            futility_margin=futility_margin,
         )
 
+        if telemetry is not None:
+            telemetry.finish_iteration(result.nodes_searched)
+
+        if stats is not None and depth_stats is not None:
+            depth_stats.time = time.perf_counter() - iteration_start
+            depth_stats.nodes = result.nodes_searched
+            depth_stats.unique_nodes = result.unique_nodes_searched
+            if len(stats.depths) > 0 and stats.depths[-1].nodes > 0:
+                depth_stats.branching_factor = (
+                    result.nodes_searched / stats.depths[-1].nodes
+                )
+            stats.depths.append(depth_stats)
+
+            if connection != None:
+                connection.send({"data": depth_stats, "type": SEARCH_STATS})
+
         if isinstance(result, FinalResult) and result.move_order != None:
             move_order = result.move_order
         else:
@@ -97,10 +256,17 @@ def get_best_move(
     if isinstance(result, FinalResult):
         result.move = pickle.loads(pickle.dumps(result.move, -1))
         result.nodes_searched = total_nodes
+        result.stats = stats
+        # Scores are always returned in points
+        if resolution is not None:
+            result.score /= resolution
 
         # print(result.score)
         # print(f"{result.nodes_searched / COMPUTER_MOVE_TIME} nodes/second")
 
+        if telemetry is not None:
+            telemetry.flush()
+
         if connection != None:
             connection.send({"data": result, "type": BEST_MOVE})
 
@@ -109,6 +275,36 @@ def get_best_move(
         raise Exception("Something went wrong")
 
 
+# Scores the position for the player whose turn it is
+def evaluate(
+    player_eval: EvaluationVersion,
+    game: Game,
+    turn: int,
+    resolution: Union[int, None],
+    stats: Union[DepthStats, None],
+) -> float:
+    if stats is not None:
+        evaluation_start = time.perf_counter()
+
+    points_results = game.calculate_points()
+
+    # Flip heuristic for player 2
+    score = game_evaluation_for_player(
+        turn,
+        game,
+        game.players[0],
+        game.players[1],
+        points_results,
+        player_eval["player_evaluation"],
+        resolution,
+    )
+
+    if stats is not None:
+        stats.evaluation_time += time.perf_counter() - evaluation_start
+
+    return score
+
+
 # Implements negascout (zero-sum minimax with iterative deepening)
 # Returns a list of sorted moves
 def negascout(
@@ -123,7 +319,10 @@ def negascout(
     alpha: float = -999999,
     beta: float = 999999,
     show_progress: bool = False,
-    connection: Union[Connection, None] = None,
+    telemetry: Union[TelemetryChannel, None] = None,
+    stats: Union[DepthStats, None] = None,
+    resolution: Union[int, None] = None,
+    futility_margin: Union[float, None] = None,
 ) -> Union[EvaluatedNode, FinalResult]:
     start_time = time.perf_counter()
 
@@ -132,22 +331,42 @@ def negascout(
 
     # # Make sure that the game is not on the first turn of the tree (leads to problems with EvaluatedNode vs. FinalResult)
     if depth < max_depth and (depth == 0 or game.are_no_moves()):
-        points_results = game.calculate_points()
-
-        # Flip heuristic for player 2
         return EvaluatedNode(
-            score=game_evaluation_for_player(
-                turn,
-                game,
-                game.players[0],
-                game.players[1],
-                points_results,
-                player_eval["player_evaluation"],
-            ),
+            score=evaluate(player_eval, game, turn, resolution, stats),
             unique_nodes_searched=1,
             nodes_searched=1,
         )
 
+    # Futility pruning: the children are leaves, and a move only changes the mover's own points (within the bounds)
+    # That is exact for evaluations that only count points (eg. v2), but v3 and v4 add estimates of future points
+    # that a move also changes, so for them pruning is only safe as far as the margin covers those changes
+    if futility_margin is not None and depth == 1 and depth < max_depth:
+        score = evaluate(player_eval, game, turn, resolution, stats)
+        lowest_gain, highest_gain = game.move_point_bounds(turn)
+        highest_change: float = highest_gain + futility_margin
+        lowest_change: float = lowest_gain - futility_margin
+
+        # Whole number scores stay whole, rounded outwards so nothing more is pruned
+        if resolution is not None:
+            highest_change = math.ceil(highest_change * resolution)
+            lowest_change = math.floor(lowest_change * resolution)
+
+        highest_score = score + highest_change
+        lowest_score = score + lowest_change
+
+        if highest_score <= alpha or lowest_score >= beta:
+            if stats is not None:
+                stats.futility_prunes += 1
+
+            return EvaluatedNode(
+                score=highest_score if highest_score <= alpha else lowest_score,
+                unique_nodes_searched=1,
+                nodes_searched=1,
+            )
+
+    if stats is not None:
+        move_generation_start = time.perf_counter()
+
     if move_order is not None and len(move_order) > 0:
         all_moves = pickle.loads(pickle.dumps(move_order, -1))
     else:
@@ -157,6 +376,9 @@ def negascout(
             reverse=True,
         )
 
+    if stats is not None:
+        stats.move_generation_time += time.perf_counter() - move_generation_start
+
     move_scores: List[Tuple[Move, float]] = []
     new_move_order: List[Move] = []
     best_move = all_moves[0]
@@ -167,11 +389,20 @@ def negascout(
         nodes_searched=0,
     )
 
-    # Tqdm is for a progress bar
-    for index, move in enumerate(tqdm(all_moves) if show_progress else all_moves):
+    # Tqdm is for a progress bar, it is only imported by searches that show one
+    moves: Iterable[Move] = all_moves
+    if show_progress:
+        from tqdm import tqdm
+
+        moves = tqdm(all_moves)
+
+    for index, move in enumerate(moves):
         game.make_move(turn, move)
 
         if time.perf_counter() - start_time > time_left:
+            if stats is not None:
+                stats.completed = False
+
             return FinalResult(
                 move=best_move,
                 move_order=[],
@@ -190,6 +421,9 @@ def negascout(
                 max_depth,
                 alpha=-beta,
                 beta=-alpha,
+                stats=stats,
+                resolution=resolution,
+                futility_margin=futility_margin,
             )
             result.score *= -1
             nodes += result.nodes_searched
@@ -204,6 +438,9 @@ def negascout(
                 max_depth,
                 alpha=-alpha - 1,
                 beta=-alpha,
+                stats=stats,
+                resolution=resolution,
+                futility_margin=futility_margin,
             )
             result.score *= -1
             nodes += result.nodes_searched
@@ -211,6 +448,9 @@ def negascout(
 
             # If null window failed high, do a full re-search
             if alpha < result.score < beta:
+                if stats is not None:
+                    stats.re_searches += 1
+
                 result = negascout(
                     player_eval,
                     game,
@@ -219,6 +459,9 @@ def negascout(
                     max_depth,
                     alpha=-beta,
                     beta=-alpha,
+                    stats=stats,
+                    resolution=resolution,
+                    futility_margin=futility_margin,
                 )
                 result.score *= -1
                 nodes += result.nodes_searched
@@ -232,12 +475,18 @@ def negascout(
         if result.score > best_score:
             best_move = move
             best_score = result.score
-            if connection:
-                connection.send({"data": best_score, "type": EVALUATION})
-                # connection.send({"data": best_move, "type": CURRENT_BEST})
+
+        # Only the root is given the telemetry channel
+        if telemetry is not None:
+            telemetry.update(max_depth, best_score, best_move, nodes)
 
         alpha = max(alpha, result.score)
         if alpha >= beta:
+            if stats is not None:
+                stats.cutoffs += 1
+                if index == 0:
+                    stats.first_move_cutoffs += 1
+
             break
 
     if depth == max_depth:
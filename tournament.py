@@ -0,0 +1,355 @@
+import argparse
+import itertools
+import math
+import os
+import random
+import sqlite3
+import time
+import uuid
+from constants import *
+from typing import Dict, List, Tuple, Union
+from evaluation import EvaluationVersion, load_player_eval
+from compare import play_game
+from workers import create_pool
+from tqdm import tqdm
+
+
+# (player1 version, player2 version, seed, first player)
+Task = Tuple[str, str, int, int]
+
+# Claims older than this are assumed to belong to a scheduler that crashed
+STALE_CLAIM_SECONDS = 6 * 60 * 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    player1 TEXT NOT NULL,
+    player2 TEXT NOT NULL,
+    seed INTEGER NOT NULL,
+    first_player INTEGER NOT NULL,
+    move_time REAL NOT NULL,
+    score_difference INTEGER NOT NULL,
+    scheduler TEXT NOT NULL,
+    finished_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS claims (
+    id INTEGER PRIMARY KEY,
+    player1 TEXT NOT NULL,
+    player2 TEXT NOT NULL,
+    seed INTEGER NOT NULL,
+    first_player INTEGER NOT NULL,
+    scheduler TEXT NOT NULL,
+    claimed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ratings (
+    version TEXT PRIMARY KEY,
+    rating REAL NOT NULL,
+    games INTEGER NOT NULL
+);
+"""
+
+
+def all_versions() -> List[str]:
+    names = [
+        file_name[:-3]
+        for file_name in os.listdir("evaluation_versions")
+        if file_name.startswith("v") and file_name.endswith(".py")
+    ]
+
+    return sorted(names, key=lambda name: int(name[1:]))
+
+
+def pair_key(player1: str, player2: str) -> Tuple[str, str]:
+    return (player1, player2) if player1 <= player2 else (player2, player1)
+
+
+class ResultsStore:
+    def __init__(self, path: str = TOURNAMENT_DATABASE) -> None:
+        # Autocommit mode, transactions are started explicitly so that writers take the lock up front
+        self.connection = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA busy_timeout=60000")
+        self.connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def game_counts(self) -> Dict[Tuple[str, str], int]:
+        counts: Dict[Tuple[str, str], int] = {}
+
+        rows = self.connection.execute(
+            "SELECT player1, player2, COUNT(*) FROM games GROUP BY player1, player2"
+        ).fetchall()
+        rows += self.connection.execute(
+            "SELECT player1, player2, COUNT(*) FROM claims WHERE claimed_at > ? GROUP BY player1, player2",
+            (time.time() - STALE_CLAIM_SECONDS,),
+        ).fetchall()
+
+        for player1, player2, count in rows:
+            key = pair_key(player1, player2)
+            counts[key] = counts.get(key, 0) + count
+
+        return counts
+
+    # Chooses the missing games and reserves them so that concurrent schedulers don't play the same games
+    # Counting and claiming happen in one transaction, another scheduler only sees the counts once the claims are in
+    def claim(
+        self,
+        versions: List[str],
+        games_per_pair: int,
+        challenger: Union[str, None],
+        scheduler: str,
+    ) -> List[Task]:
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            tasks = schedule(self.game_counts(), versions, games_per_pair, challenger)
+
+            now = time.time()
+            self.connection.executemany(
+                "INSERT INTO claims (player1, player2, seed, first_player, scheduler, claimed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                [(*task, scheduler, now) for task in tasks],
+            )
+            self.connection.execute("COMMIT")
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+
+        return tasks
+
+    def release_claims(self, scheduler: str) -> None:
+        self.connection.execute("DELETE FROM claims WHERE scheduler = ?", (scheduler,))
+
+    def ratings(self) -> Dict[str, Tuple[float, int]]:
+        rows = self.connection.execute(
+            "SELECT version, rating, games FROM ratings"
+        ).fetchall()
+
+        return {version: (rating, games) for version, rating, games in rows}
+
+    # Stores a finished game and updates the Elo ratings in the same transaction
+    def record(
+        self, task: Task, move_time: float, score_difference: int, scheduler: str
+    ) -> None:
+        player1, player2, seed, first_player = task
+
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            self.connection.execute(
+                "INSERT INTO games (player1, player2, seed, first_player, move_time, score_difference, scheduler, finished_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    player1,
+                    player2,
+                    seed,
+                    first_player,
+                    move_time,
+                    score_difference,
+                    scheduler,
+                    time.time(),
+                ),
+            )
+            self.connection.execute(
+                "DELETE FROM claims WHERE id = (SELECT id FROM claims WHERE player1 = ? AND player2 = ? AND seed = ? AND first_player = ? AND scheduler = ? LIMIT 1)",
+                (*task, scheduler),
+            )
+
+            rating1, games1 = self.rating(player1)
+            rating2, games2 = self.rating(player2)
+            change = elo_change(rating1, rating2, game_result(score_difference))
+
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO ratings (version, rating, games) VALUES (?, ?, ?)",
+                [
+                    (player1, rating1 + change, games1 + 1),
+                    (player2, rating2 - change, games2 + 1),
+                ],
+            )
+            self.connection.execute("COMMIT")
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+
+    def rating(self, version: str) -> Tuple[float, int]:
+        row = self.connection.execute(
+            "SELECT rating, games FROM ratings WHERE version = ?", (version,)
+        ).fetchone()
+
+        return (INITIAL_ELO, 0) if row is None else (row[0], row[1])
+
+    def results(self) -> List[Tuple[str, str, int]]:
+        return self.connection.execute(
+            "SELECT player1, player2, score_difference FROM games"
+        ).fetchall()
+
+
+# 1 for a player 1 win, 0.5 for a tie and 0 for a player 2 win
+def game_result(score_difference: int) -> float:
+    if score_difference > 0:
+        return 1
+    elif score_difference < 0:
+        return 0
+    else:
+        return 0.5
+
+
+def expected_score(rating: float, opponent_rating: float) -> float:
+    return 1 / (1 + 10 ** ((opponent_rating - rating) / 400))
+
+
+def elo_change(rating1: float, rating2: float, result: float) -> float:
+    return ELO_K_FACTOR * (result - expected_score(rating1, rating2))
+
+
+# Bradley-Terry ratings fitted to all stored games (ties count as half a win for each side)
+# Unlike the incremental Elo, the result does not depend on the order that games were played in
+def maximum_likelihood_ratings(
+    results: List[Tuple[str, str, int]], iterations: int = 1000
+) -> Dict[str, float]:
+    wins: Dict[str, float] = {}
+    games: Dict[Tuple[str, str], int] = {}
+
+    for player1, player2, score_difference in results:
+        result = game_result(score_difference)
+        wins[player1] = wins.get(player1, 0) + result
+        wins[player2] = wins.get(player2, 0) + 1 - result
+
+        key = pair_key(player1, player2)
+        games[key] = games.get(key, 0) + 1
+
+    # A prior of one win and one loss against a virtual opponent of strength 1 keeps undefeated versions finite
+    strengths = {version: 1.0 for version in wins}
+    for _ in range(iterations):
+        new_strengths: Dict[str, float] = {}
+
+        for version in strengths:
+            denominator = 2 / (strengths[version] + 1)
+            for (version1, version2), count in games.items():
+                if version in (version1, version2):
+                    opponent = version2 if version == version1 else version1
+                    denominator += count / (strengths[version] + strengths[opponent])
+
+            new_strengths[version] = (wins[version] + 1) / denominator
+
+        strengths = new_strengths
+
+    # Anchor the average rating at INITIAL_ELO
+    ratings = {
+        version: 400 * math.log10(strength) for version, strength in strengths.items()
+    }
+    if len(ratings) > 0:
+        offset = INITIAL_ELO - sum(ratings.values()) / len(ratings)
+        ratings = {version: rating + offset for version, rating in ratings.items()}
+
+    return ratings
+
+
+# Tasks for the games that are missing from counts (finished and claimed games of every pairing)
+def schedule(
+    counts: Dict[Tuple[str, str], int],
+    versions: List[str],
+    games_per_pair: int,
+    challenger: Union[str, None] = None,
+) -> List[Task]:
+    if challenger is None:
+        # Round robin, every version plays every other version
+        pairs = list(itertools.combinations(versions, 2))
+    else:
+        # Gauntlet, the challenger plays every other version
+        pairs = [(challenger, version) for version in versions if version != challenger]
+
+    pair_tasks: List[List[Task]] = []
+
+    for player1, player2 in pairs:
+        needed = games_per_pair - counts.get(pair_key(player1, player2), 0)
+        tasks: List[Task] = []
+
+        # Games are played in pairs with the same seed and alternating first players
+        for _ in range(math.ceil(max(needed, 0) / 2)):
+            seed = random.randint(0, 2**31 - 1)
+            tasks.append((player1, player2, seed, 0))
+            tasks.append((player1, player2, seed, 1))
+
+        pair_tasks.append(tasks)
+
+    # Interleave pairings so every pairing makes progress at the same rate
+    return [
+        task
+        for round_tasks in itertools.zip_longest(*pair_tasks)
+        for task in round_tasks
+        if task is not None
+    ]
+
+
+loaded_evals: Dict[str, EvaluationVersion] = {}
+
+
+# Evaluations are loaded once per worker instead of being pickled with every task
+def play_task(task: Task, move_time: float) -> Tuple[Task, int]:
+    player1, player2, seed, first_player = task
+
+    for version in (player1, player2):
+        if version not in loaded_evals:
+            loaded_evals[version] = load_player_eval(version)
+
+    score_difference = play_game(
+        move_time,
+        loaded_evals[player1],
+        loaded_evals[player2],
+        seed=seed,
+        first_player=first_player,
+    )
+
+    return task, score_difference
+
+
+def unpack(args: Tuple[Task, float]) -> Tuple[Task, int]:
+    return play_task(*args)
+
+
+def print_ratings(store: ResultsStore) -> None:
+    elo = store.ratings()
+    bayes = maximum_likelihood_ratings(store.results())
+
+    print(f"{'Version':<10}{'Elo':>8}{'BT Elo':>10}{'Games':>8}")
+    for version in sorted(elo, key=lambda version: -elo[version][0]):
+        rating, games = elo[version]
+        print(f"{version:<10}{rating:>8.0f}{bayes.get(version, 0):>10.0f}{games:>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Play a rating ladder between evaluation versions"
+    )
+    parser.add_argument("--versions", nargs="+", default=None)
+    parser.add_argument("--gauntlet", default=None, metavar="VERSION")
+    parser.add_argument("--games", type=int, default=NUM_COMPARE_ROUNDS)
+    parser.add_argument("--move-time", type=float, default=COMPARE_COMPUTER_MOVE_TIME)
+    parser.add_argument("--database", default=TOURNAMENT_DATABASE)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--ratings", action="store_true", help="Only print ratings")
+    args = parser.parse_args()
+
+    store = ResultsStore(args.database)
+
+    if args.ratings:
+        print_ratings(store)
+        store.close()
+        raise SystemExit
+
+    versions = args.versions if args.versions is not None else all_versions()
+    scheduler = uuid.uuid4().hex
+    tasks = store.claim(versions, args.games, args.gauntlet, scheduler)
+
+    try:
+        with create_pool(args.processes) as pool:
+            progress_bar = tqdm(
+                pool.imap_unordered(unpack, [(task, args.move_time) for task in tasks]),
+                total=len(tasks),
+            )
+
+            for task, score_difference in progress_bar:
+                store.record(task, args.move_time, score_difference, scheduler)
+
+    finally:
+        store.release_claims(scheduler)
+        print_ratings(store)
+        store.close()
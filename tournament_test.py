@@ -0,0 +1,88 @@
+from constants import *
+import threading
+from tournament import (
+    ResultsStore,
+    elo_change,
+    maximum_likelihood_ratings,
+    pair_key,
+)
+
+
+def test_claims_and_resume(tmp_path):
+    path = str(tmp_path / "results.db")
+    store = ResultsStore(path)
+
+    tasks = store.claim(["v1", "v2"], 4, None, "first")
+    assert len(tasks) == 4
+    assert {pair_key(player1, player2) for player1, player2, _, _ in tasks} == {
+        ("v1", "v2")
+    }
+
+    # Another scheduler sees the claimed games as taken
+    other = ResultsStore(path)
+    assert other.claim(["v1", "v2"], 4, None, "second") == []
+
+    # The first scheduler finishes two games and stops, its other claims are released
+    for task in tasks[:2]:
+        store.record(task, 0.1, 1, "first")
+    store.release_claims("first")
+
+    assert len(other.claim(["v1", "v2"], 4, None, "second")) == 2
+
+    store.close()
+    other.close()
+
+
+def test_concurrent_claims(tmp_path):
+    path = str(tmp_path / "results.db")
+    ResultsStore(path).close()
+    claimed = []
+
+    def claim(scheduler: str):
+        store = ResultsStore(path)
+        claimed.extend(store.claim(["v1", "v2", "v3"], 10, None, scheduler))
+        store.close()
+
+    threads = [
+        threading.Thread(target=claim, args=(f"scheduler{index}",))
+        for index in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Every pairing is claimed exactly once in total
+    assert len(claimed) == 3 * 10
+
+
+def test_rating_update(tmp_path):
+    store = ResultsStore(str(tmp_path / "results.db"))
+
+    store.record(("v1", "v2", 0, 0), 0.1, 5, "scheduler")
+    ratings = store.ratings()
+
+    assert ratings["v1"] == (INITIAL_ELO + ELO_K_FACTOR / 2, 1)
+    assert ratings["v2"] == (INITIAL_ELO - ELO_K_FACTOR / 2, 1)
+    assert store.results() == [("v1", "v2", 5)]
+
+    # A favourite gains less from a win than an underdog
+    assert elo_change(1600, 1400, 1) < elo_change(1400, 1600, 1)
+
+    store.close()
+
+
+def test_maximum_likelihood_ratings():
+    results = [("v1", "v2", 3)] * 6 + [("v1", "v2", -3)] * 2 + [("v2", "v3", 0)] * 4
+    ratings = maximum_likelihood_ratings(results)
+
+    assert ratings["v1"] > ratings["v2"]
+    assert ratings["v1"] > ratings["v3"]
+    assert abs(sum(ratings.values()) / len(ratings) - INITIAL_ELO) < 1e-6
+
+
+def test_undefeated_rating_is_finite():
+    ratings = maximum_likelihood_ratings([("v1", "v2", 10)] * 20)
+
+    assert ratings["v1"] > ratings["v2"]
+    assert ratings["v1"] - ratings["v2"] < 2000
@@ -0,0 +1,174 @@
+import argparse
+import os
+from constants import *
+from typing import Tuple
+from dataset import FEATURE_COUNT, iterate_batches
+from evaluation_versions.v4 import base_model
+import numpy as np
+import torch
+import torch.nn as nn
+
+
+# Offsets into Game.features
+PATTERN_LINE_OFFSET = (FACTORY_COUNT + 1) * len(TILE_TYPES) + 1
+FLOOR_OFFSET = PATTERN_LINE_OFFSET + 3 * WALL_SIZE + WALL_SIZE * WALL_SIZE
+PLAYER_FEATURE_COUNT = FLOOR_OFFSET + 2
+
+
+# Builds the same 18 inputs as evaluation_versions.v4.nn_inputs for both players
+def v4_inputs(features: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    num_rows = len(features)
+    rows_left = features[:, FEATURE_COUNT - 1]
+
+    # Tile counts are stored per tile type for every factory and the center pile
+    tile_counts = (
+        features[:, 1 : 1 + (FACTORY_COUNT + 1) * len(TILE_TYPES)]
+        .reshape(num_rows, len(TILE_TYPES), FACTORY_COUNT + 1)
+        .sum(axis=2)
+    )
+    # Index 0 (an empty pattern line) always has a count of 0
+    tile_counts = np.concatenate([np.zeros((num_rows, 1)), tile_counts], axis=1)
+
+    player_inputs = []
+    for player_index in [0, 1]:
+        offset = 1 + player_index * PLAYER_FEATURE_COUNT
+        lines_start = offset + PATTERN_LINE_OFFSET
+        lines = features[:, lines_start : lines_start + 3 * WALL_SIZE].reshape(
+            num_rows, WALL_SIZE, 3
+        )
+
+        space = lines[:, :, 0]
+        tile = lines[:, :, 1].astype(np.int64)
+        potential_points = lines[:, :, 2]
+        line_tile_counts = np.take_along_axis(tile_counts, tile, axis=1)
+
+        inputs = np.stack([space, potential_points, line_tile_counts], axis=2).reshape(
+            num_rows, 3 * WALL_SIZE
+        )
+        player_inputs.append(
+            np.concatenate(
+                [
+                    inputs,
+                    features[:, offset + FLOOR_OFFSET : offset + FLOOR_OFFSET + 2],
+                    rows_left[:, None],
+                ],
+                axis=1,
+            ).astype(np.float32)
+        )
+
+    return player_inputs[0], player_inputs[1]
+
+
+# The search score is the difference between both players' v4 evaluations, which add the network to Game.basic_points
+def predict(model: nn.Sequential, features: np.ndarray) -> torch.Tensor:
+    player1_inputs, player2_inputs = v4_inputs(features)
+    basic_points = torch.from_numpy(features[:, 0].astype(np.float32))
+
+    return (
+        basic_points
+        + model(torch.from_numpy(player1_inputs)).squeeze(1)
+        - model(torch.from_numpy(player2_inputs)).squeeze(1)
+    )
+
+
+def validation_loss(model: nn.Sequential, args: argparse.Namespace) -> float:
+    total_loss = 0.0
+    total_rows = 0
+
+    model.eval()
+    with torch.no_grad():
+        for features, scores in iterate_batches(
+            args.data,
+            args.batch_size,
+            split="validation",
+            validation_fraction=args.validation_fraction,
+        ):
+            loss = nn.functional.mse_loss(
+                predict(model, features), torch.from_numpy(scores), reduction="sum"
+            )
+            total_loss += loss.item()
+            total_rows += len(scores)
+
+    return total_loss / max(total_rows, 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Fit the v4 network to the search scores of self-play positions"
+    )
+    parser.add_argument("--data", default=DATASET_DIRECTORY)
+    parser.add_argument("--epochs", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=1024)
+    parser.add_argument("--learning-rate", type=float, default=1e-3)
+    parser.add_argument("--validation-fraction", type=float, default=0.1)
+    parser.add_argument("--checkpoint", default="train_checkpoint.pt")
+    parser.add_argument("--output", default="nn_evaluation.pt")
+    parser.add_argument(
+        "--from-current",
+        action="store_true",
+        help="Start from the weights in nn_evaluation.pt instead of random weights",
+    )
+    args = parser.parse_args()
+
+    model = base_model()
+    optimizer = torch.optim.Adam(model.parameters(), lr=args.learning_rate)
+    start_epoch = 0
+    best_loss = float("inf")
+
+    # Continue an interrupted run
+    if os.path.exists(args.checkpoint):
+        checkpoint = torch.load(args.checkpoint)
+        model.load_state_dict(checkpoint["model"])
+        optimizer.load_state_dict(checkpoint["optimizer"])
+        start_epoch = checkpoint["epoch"] + 1
+        best_loss = checkpoint["best_loss"]
+        print(f"Resuming from epoch {start_epoch}")
+    elif args.from_current:
+        model.load_state_dict(torch.load("nn_evaluation.pt"))
+    else:
+        # The network ends with a ReLU, so start with a positive output to keep gradients flowing
+        nn.init.constant_(model[-2].bias, 1)
+
+    for epoch in range(start_epoch, args.epochs):
+        total_loss = 0.0
+        total_rows = 0
+
+        model.train()
+        for features, scores in iterate_batches(
+            args.data,
+            args.batch_size,
+            shuffle=True,
+            seed=epoch,
+            split="train",
+            validation_fraction=args.validation_fraction,
+        ):
+            optimizer.zero_grad()
+            loss = nn.functional.mse_loss(
+                predict(model, features), torch.from_numpy(scores)
+            )
+            loss.backward()
+            optimizer.step()
+
+            total_loss += loss.item() * len(scores)
+            total_rows += len(scores)
+
+        loss = validation_loss(model, args)
+        print(
+            f"Epoch {epoch}: train loss {total_loss / max(total_rows, 1):.4f}, validation loss {loss:.4f}"
+        )
+
+        # Only the model with the best validation loss replaces the evaluation weights
+        if loss < best_loss:
+            best_loss = loss
+            torch.save(model.state_dict(), args.output)
+            print(f"Saved {args.output}")
+
+        torch.save(
+            {
+                "model": model.state_dict(),
+                "optimizer": optimizer.state_dict(),
+                "epoch": epoch,
+                "best_loss": best_loss,
+            },
+            args.checkpoint,
+        )
@@ -0,0 +1,80 @@
+import argparse
+import numpy as np
+import pytest
+import torch
+from benchmark_corpus import load_corpus
+from dataset import ShardWriter
+from evaluation_versions.v4 import base_model, nn_evaluation, nn_inputs
+from train import predict, v4_inputs, validation_loss
+
+
+CORPUS = load_corpus()
+
+
+# The corpus positions, and the same positions as if it was still the first round
+def positions():
+    for game, _ in CORPUS.values():
+        yield game
+        first_round = game.copy()
+        first_round.is_first_round = True
+        yield first_round
+
+
+def features(games):
+    return np.array(
+        [game.features(game.calculate_points()) for game in games], dtype=np.float32
+    )
+
+
+def test_inputs_match_evaluation():
+    games = list(positions())
+    player_inputs = v4_inputs(features(games))
+
+    for row, game in enumerate(games):
+        points_results = game.calculate_points()
+
+        for player_index, player in enumerate(game.players):
+            assert list(player_inputs[player_index][row]) == pytest.approx(
+                nn_inputs(game, player, points_results[player_index])
+            )
+
+
+def test_predict_matches_evaluation():
+    torch.manual_seed(0)
+    model = base_model()
+    model.eval()
+
+    games = list(positions())
+    with torch.no_grad():
+        predictions = predict(model, features(games))
+
+    for game, prediction in zip(games, predictions):
+        points_results = game.calculate_points()
+        expected = nn_evaluation(
+            model, game, game.players[0], points_results[0]
+        ) - nn_evaluation(model, game, game.players[1], points_results[1])
+
+        assert prediction.item() == pytest.approx(expected, abs=1e-4)
+
+
+def test_validation_loss(tmp_path):
+    torch.manual_seed(0)
+    model = base_model()
+    model.eval()
+
+    games = list(positions())
+    with torch.no_grad():
+        predictions = predict(model, features(games)).numpy()
+
+    # Every score is one point above what the model predicts
+    writer = ShardWriter(str(tmp_path), shard_size=10)
+    writer.write(
+        [
+            (game.features(game.calculate_points()), float(prediction) + 1)
+            for game, prediction in zip(games, predictions)
+        ]
+    )
+    writer.close()
+
+    args = argparse.Namespace(data=str(tmp_path), batch_size=5, validation_fraction=1.0)
+    assert validation_loss(model, args) == pytest.approx(1, abs=1e-4)
@@ -0,0 +1,119 @@
+import multiprocessing
+import os
+import sys
+from constants import *
+from multiprocessing.context import BaseContext
+from multiprocessing.pool import Pool
+from importlib import import_module
+from typing import Any, List, Union
+
+
+# Environment variables read by the BLAS/OpenMP runtimes that torch (and numpy) link against
+THREAD_ENVIRONMENT_VARIABLES = [
+    "OMP_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+]
+
+
+def limit_threads(num_threads: int = WORKER_TORCH_THREADS) -> None:
+    for variable in THREAD_ENVIRONMENT_VARIABLES:
+        os.environ[variable] = str(num_threads)
+
+    # Torch reads the environment when it is first imported, so only an already imported torch has to be told directly
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(num_threads)
+        try:
+            torch.set_num_interop_threads(num_threads)
+        except RuntimeError:
+            # Interop threads can only be set before torch starts any parallel work
+            pass
+
+
+def pin_to_cpu(worker_number: int, cpus: Union[List[int], None] = None) -> None:
+    # CPU affinity is only supported on Linux
+    if not hasattr(os, "sched_setaffinity"):
+        return
+
+    if cpus is None:
+        cpus = sorted(os.sched_getaffinity(0))
+
+    os.sched_setaffinity(0, {cpus[worker_number % len(cpus)]})
+
+
+# Modules that every engine process imports (evaluation versions are added by their users)
+ENGINE_MODULES = ["game", "evaluation", "search"]
+
+
+# Falls back to the platform default where a fork server is not available (Windows)
+def get_context(
+    start_method: Union[StartMethod, None],
+    preload: Union[List[str], None] = None,
+) -> BaseContext:
+    if start_method not in multiprocessing.get_all_start_methods():
+        start_method = None
+
+    context = multiprocessing.get_context(start_method)
+
+    # The fork server imports these before forking any process, only the first call starts the server
+    if context.get_start_method() == "forkserver":
+        context.set_forkserver_preload([*ENGINE_MODULES, *(preload or [])])
+
+    return context
+
+
+def init_worker(
+    num_threads: int,
+    worker_counter: Any = None,
+    cpus: Union[List[int], None] = None,
+    preload: Union[List[str], None] = None,
+) -> None:
+    limit_threads(num_threads)
+
+    # Imported before the first task, so that no task waits for them
+    for module in preload or []:
+        import_module(module)
+
+    # Every worker takes the next number from the shared counter to choose its CPU
+    if worker_counter is not None:
+        with worker_counter.get_lock():
+            worker_number = worker_counter.value
+            worker_counter.value += 1
+
+        pin_to_cpu(worker_number, cpus)
+
+
+def worker_count() -> int:
+    if WORKER_POOL_SIZE is not None:
+        return WORKER_POOL_SIZE
+
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+
+    return os.cpu_count() or 1
+
+
+# Creates a pool whose workers each use a single torch/BLAS thread (and optionally their own CPU)
+def create_pool(
+    processes: Union[int, None] = None,
+    *,
+    num_threads: int = WORKER_TORCH_THREADS,
+    pin_cpus: bool = PIN_WORKER_CPUS,
+    cpus: Union[List[int], None] = None,
+    start_method: Union[StartMethod, None] = WORKER_START_METHOD,
+    preload: Union[List[str], None] = None,
+) -> Pool:
+    if processes is None:
+        processes = worker_count()
+
+    context = get_context(start_method, preload)
+    worker_counter = context.Value("i", 0) if pin_cpus else None
+
+    return context.Pool(
+        processes,
+        initializer=init_worker,
+        initargs=(num_threads, worker_counter, cpus, preload),
+    )